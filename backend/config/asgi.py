@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# no persistent DB connections under ASGI (see DATABASES in settings)
+os.environ.setdefault('DB_PROCESS_ROLE', 'asgi')
 
 application = get_asgi_application()
@@ -5,6 +5,8 @@ Django settings for swot-coach project (optimized for Next.js dev).
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # ----------------------
 # BASE
 # ----------------------
@@ -53,6 +55,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Opt-in per-request query/latency metrics (Server-Timing header + /api/metrics/)
+API_METRICS_ENABLED = os.environ.get("API_METRICS", "0") == "1"
+# log requests running more SQL queries than this (0 = off)
+API_METRICS_QUERY_BUDGET = int(os.environ.get("API_METRICS_QUERY_BUDGET", 20))
+if API_METRICS_ENABLED:
+    MIDDLEWARE.insert(1, "core.middleware.APIMetricsMiddleware")
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -75,17 +84,85 @@ WSGI_APPLICATION = "config.wsgi.application"
 # ----------------------
 # DATABASE
 # ----------------------
+# Persistent connections: each thread keeps its connection for CONN_MAX_AGE
+# seconds instead of reconnecting per request / django-q task, and
+# CONN_HEALTH_CHECKS pings a reused connection before handing it out.
+# Open connections = web processes x threads + Q_CLUSTER workers; size
+# Postgres max_connections (or the PgBouncer pool) for that sum.
+# DB_PROCESS_ROLE is set per entrypoint:
+#   web    - WSGI (default)
+#   worker - qcluster: few, long tasks, so connections are kept longer
+#   asgi   - set by config/asgi.py. Persistent connections must stay off
+#            under ASGI: every sync_to_async thread would keep its own.
+#            Use PgBouncer to pool them instead.
+DB_PROCESS_ROLE = os.environ.get("DB_PROCESS_ROLE", "web")
+if DB_PROCESS_ROLE == "worker":
+    DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE_WORKER", 600))
+elif DB_PROCESS_ROLE == "asgi":
+    DB_CONN_MAX_AGE = 0
+elif DB_PROCESS_ROLE == "web":
+    DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+else:
+    raise ImproperlyConfigured(f"DB_PROCESS_ROLE must be web, worker or asgi, not {DB_PROCESS_ROLE!r}.")
+# DB_POOLER=pgbouncer (transaction pooling): server-side cursors can't
+# outlive a transaction there, so Django must not use them
+DB_POOLER = os.environ.get("DB_POOLER", "")
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        # django.db.backends.postgresql plus connection metrics
+        "ENGINE": "core.db_backends.postgresql",
         "NAME": os.environ.get("POSTGRES_DB", "swot_db"),
         "USER": os.environ.get("POSTGRES_USER", "postgres"),
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "08068166679Aa."),
         "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
         "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOLER == "pgbouncer",
     }
 }
 
+# Local SQLite (e.g. for benchmarks without a Postgres server): DJANGO_DB=sqlite
+if os.environ.get("DJANGO_DB") == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "core.db_backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+
+# ----------------------
+# CACHE
+# ----------------------
+# locmem for dev/tests; DJANGO_CACHE=redis in production (separate db from django-q).
+# locmem is per process: cache invalidation, ETag revisions, throttle buckets
+# and lazy-generation markers don't reach other gunicorn workers. Outside
+# DEBUG it must be chosen explicitly (DJANGO_CACHE=locmem, single process only).
+DJANGO_CACHE = os.environ.get("DJANGO_CACHE", "locmem" if DEBUG else "")
+if not DJANGO_CACHE:
+    raise ImproperlyConfigured("Set DJANGO_CACHE=redis (or locmem for a single-process deployment).")
+if DJANGO_CACHE == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://:{password}@{host}:{port}/{db}".format(
+                password=os.environ.get("REDIS_PASSWORD", ""),
+                host=os.environ.get("REDIS_HOST", "127.0.0.1"),
+                port=os.environ.get("REDIS_PORT", 6379),
+                db=os.environ.get("REDIS_CACHE_DB", 1),
+            ),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # ----------------------
 # AUTH / PASSWORD
 # ----------------------
@@ -101,13 +178,30 @@ AUTH_PASSWORD_VALIDATORS = [
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",  # optional
+        # Authorization: Bearer <token> from /api/auth/login/ or /api/auth/me/
+        "core.authentication.SignedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",  # or AllowAny if you’re testing
     ],
+    # token buckets for the auth endpoints (core.throttling): burst of N, refilled at N per period
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "30/min",
+        "login_email": "10/min",
+        "signup_ip": "10/hour",
+        "password_reset_ip": "20/hour",
+        "password_reset_email": "5/hour",
+    },
+    # reverse proxies in front of the app: throttles key on the client IP they
+    # append to X-Forwarded-For. 0 uses REMOTE_ADDR, ignoring the (spoofable) header.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
 }
 
+# signed bearer token lifetime, seconds (core.authentication)
+AUTH_TOKEN_TTL = int(os.environ.get("AUTH_TOKEN_TTL", 60 * 60))
+# absolute limit from login; renewing a token near expiry can't extend past it
+AUTH_TOKEN_MAX_LIFETIME = int(os.environ.get("AUTH_TOKEN_MAX_LIFETIME", 24 * 60 * 60))
+
 # ----------------------
 # INTERNATIONALIZATION
 # ----------------------
@@ -144,9 +238,17 @@ SESSION_COOKIE_SECURE = False
 # ----------------------
 # Django Q
 # ----------------------
+# How tasks come into existence:
+#   nightly - the scheduled job writes tomorrow's tasks for every active item
+#   lazy    - no nightly job; a day is written on its owner's first read
+#   hybrid  - both (a missed night is filled in on read)
+TASK_GENERATION_MODE = os.environ.get("TASK_GENERATION_MODE", "nightly")
+# Lazy reads never materialize days further ahead than this
+TASK_GENERATION_LAZY_MAX_DAYS_AHEAD = int(os.environ.get("TASK_GENERATION_LAZY_MAX_DAYS_AHEAD", 31))
+
 Q_CLUSTER = {
     "name": "swotcoach",
-    "workers": 4,
+    "workers": int(os.environ.get("Q_WORKERS", 4)),  # one DB connection each
     "timeout": 90,
     "retry": 120,
     "queue_limit": 500,
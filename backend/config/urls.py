@@ -5,4 +5,5 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("core.urls")),          # <- swot, tasks, streak
     path("api/auth/", include("core.auth_urls")),  # <- authentication endpoints
+    path("api/async/", include("core.async_urls")),  # <- async read endpoints (ASGI)
 ]
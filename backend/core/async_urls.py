@@ -0,0 +1,10 @@
+from django.urls import path
+from . import async_views
+
+# Mounted at /api/async/ (see config/urls.py); async twins of the read endpoints
+urlpatterns = [
+    path("auth/me/", async_views.me_view),            # GET /api/async/auth/me/
+    path("swot/", async_views.swot_list_view),        # GET /api/async/swot/
+    path("tasks/", async_views.task_list_view),       # GET /api/async/tasks/?date=YYYY-MM-DD
+    path("streak/", async_views.streak_view),         # GET /api/async/streak/
+]
@@ -0,0 +1,170 @@
+"""
+Async read-only endpoints for the dashboard, mounted under /api/async/ and
+/api/dashboard/.
+
+Plain Django async views on the async ORM (``aget``, ``async for``), so
+under ASGI a request waiting on the database doesn't tie up the event
+loop. On Django 4.2 the async ORM still runs every query through the one
+thread-sensitive ``sync_to_async`` executor, so queries run one after
+another, never in parallel. They return the same JSON as their DRF
+counterparts in views.py (full lists, no pagination) and honour the same
+ETags. They accept a session or a bearer token from core.authentication.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.db.models import Count
+from django.http import HttpResponseNotAllowed, HttpResponseNotModified, JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+
+from .authentication import bearer_token, user_for_token
+from .caching import get_revision, get_task_list, set_task_list
+from .models import Streak, SWOTItem, Task
+from .serializers import swot_item_rows, task_rows
+from .services import materialize_day
+from .views import _etag_matches, _format_etag, _parse_date, _with_etag
+
+_aget_user = sync_to_async(get_user)
+_auser_for_token = sync_to_async(user_for_token)
+_aget_revision = sync_to_async(get_revision)
+_aget_task_list = sync_to_async(get_task_list)
+_aset_task_list = sync_to_async(set_task_list)
+_amaterialize_day = sync_to_async(materialize_day)
+
+
+# -------------------
+# Helpers
+# -------------------
+
+def _json(data, status=200):
+    # DRF's encoder, so dates and decimals render as in the sync API
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+def async_login_required(view):
+    """
+    GET only; resolve the bearer-token or session user off the event loop,
+    403 like DRF when anonymous.
+    """
+    # django.views.decorators.http isn't async-aware before Django 5.0
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET", "HEAD"])
+        try:
+            token = bearer_token(request)
+        except AuthenticationFailed as exc:
+            return _json({"detail": exc.detail}, status=403)
+        if token is not None:
+            user = await _auser_for_token(token)
+            if user is None:
+                return _json({"detail": "Invalid or expired token."}, status=403)
+        else:
+            user = await _aget_user(request)
+            if not user.is_authenticated:
+                return _json({"detail": "Authentication credentials were not provided."}, status=403)
+        request.user = user
+        return await view(request, user, *args, **kwargs)
+    return wrapper
+
+
+async def _cached(request, user, scope, build, *parts):
+    """Serve ``build(revision)`` as JSON, or 304 when If-None-Match matches."""
+    revision = await _aget_revision(user.id, scope)
+    etag = _format_etag(scope, user.id, revision, *parts)
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = _json(await build(revision))
+    return _with_etag(response, etag)
+
+
+# -------------------
+# Payload builders (shared with the dashboard)
+# -------------------
+
+def _user_data(user):
+    return {"id": user.id, "email": user.email, "timezone": user.timezone, "created_at": user.date_joined}
+
+
+async def _swot_items(user):
+    return await swot_item_rows.arender(SWOTItem.objects.filter(owner=user))
+
+
+async def _tasks(user, day, revision=None):
+    # the dashboard path; task_list_view materializes before its ETag check
+    await _amaterialize_day(user, day)
+    if revision is None:
+        revision = await _aget_revision(user.id, "tasks")
+    data = await _aget_task_list(user.id, day, revision)
+    if data is None:
+        data = await task_rows.arender(Task.objects.filter(owner=user, date=day).order_by("created_at"))
+        await _aset_task_list(user.id, day, revision, data)
+    return data
+
+
+async def _streak(user):
+    row = await Streak.objects.filter(owner=user).values_list("count", "last_day").afirst()
+    count, last_day = row or (0, None)
+    return {"count": count, "last_day": last_day}
+
+
+async def _swot_summary(user):
+    by_type = {
+        row["type"]: row["n"]
+        async for row in SWOTItem.objects.filter(owner=user, active=True)
+        .order_by()
+        .values("type")
+        .annotate(n=Count("id"))
+    }
+    return {"active": sum(by_type.values()), "by_type": by_type}
+
+
+# -------------------
+# Endpoints
+# -------------------
+
+@async_login_required
+async def me_view(request, user):
+    """GET /api/async/auth/me/"""
+    return _json(_user_data(user))
+
+
+@async_login_required
+async def swot_list_view(request, user):
+    """GET /api/async/swot/"""
+    return await _cached(request, user, "swot", lambda revision: _swot_items(user))
+
+
+@async_login_required
+async def task_list_view(request, user):
+    """GET /api/async/tasks/?date=YYYY-MM-DD (default = the user's today)"""
+    date_param = request.GET.get("date")
+    day = _parse_date(date_param) if date_param else user.local_today()
+    if day is None:
+        return _json({"detail": "Invalid date format YYYY-MM-DD."}, status=400)
+    await _amaterialize_day(user, day)
+    return await _cached(request, user, "tasks", lambda revision: _tasks(user, day, revision), day)
+
+
+@async_login_required
+async def streak_view(request, user):
+    """GET /api/async/streak/"""
+    return await _cached(request, user, "streak", lambda revision: _streak(user))
+
+
+@async_login_required
+async def dashboard_view(request, user):
+    """
+    GET /api/dashboard/: the user, today's tasks, streak and a SWOT summary
+    in one response. The parts are gathered, but their queries run one at
+    a time (see the module docstring); the gain is one round trip for the
+    client instead of four.
+    """
+    tasks, streak, swot = await asyncio.gather(
+        _tasks(user, user.local_today()), _streak(user), _swot_summary(user),
+    )
+    return _json({"user": _user_data(user), "tasks": tasks, "streak": streak, "swot": swot})
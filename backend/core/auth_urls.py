@@ -1,6 +1,29 @@
 from django.urls import path, include
+from django_rest_passwordreset.views import (
+    ResetPasswordConfirm, ResetPasswordRequestToken, ResetPasswordValidateToken,
+)
+from .throttling import PasswordResetConfirmThrottle, PasswordResetEmailThrottle, PasswordResetIPThrottle
 from .views import SignupView, LoginView, logout_view, csrf_view, me_view
 
+# django_rest_passwordreset.urls, with throttles (the package ships none)
+password_reset_urls = [
+    path(
+        "validate_token/",
+        ResetPasswordValidateToken.as_view(throttle_classes=[PasswordResetIPThrottle]),
+        name="reset-password-validate",
+    ),
+    path(
+        "confirm/",
+        ResetPasswordConfirm.as_view(throttle_classes=[PasswordResetConfirmThrottle]),
+        name="reset-password-confirm",
+    ),
+    path(
+        "",
+        ResetPasswordRequestToken.as_view(throttle_classes=[PasswordResetIPThrottle, PasswordResetEmailThrottle]),
+        name="reset-password-request",
+    ),
+]
+
 urlpatterns = [
     path("signup/", SignupView.as_view()),          # POST /api/auth/signup/
     path("login/", LoginView.as_view()),            # POST /api/auth/login/
@@ -9,6 +32,6 @@ urlpatterns = [
     path("me/", me_view),                           # GET /api/auth/me/
     path(
         "password_reset/", 
-        include("django_rest_passwordreset.urls", namespace="password_reset"),
+        include((password_reset_urls, "password_reset"), namespace="password_reset"),
     ),
 ]
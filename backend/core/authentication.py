@@ -0,0 +1,185 @@
+"""
+Stateless bearer tokens for API clients.
+
+A token is ``<user id>.<auth hash>.<login time>:<timestamp>:<signature>``,
+signed with an HMAC under SECRET_KEY (django.core.signing). Checking one
+needs no password hashing and no session read, and the user comes from a
+small in-process cache, so a cache hit costs no query at all. The auth hash
+is derived from the password hash, so changing the password revokes
+outstanding tokens.
+
+A token expires AUTH_TOKEN_TTL after it was signed. It can be renewed near
+expiry (``renew_token``), but renewals keep the login time, so no chain of
+tokens outlives AUTH_TOKEN_MAX_LIFETIME.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import User
+
+# Token lifetime in seconds (AUTH_TOKEN_TTL in settings)
+TOKEN_TTL = getattr(settings, "AUTH_TOKEN_TTL", 60 * 60)
+# Absolute lifetime from login, across renewals (AUTH_TOKEN_MAX_LIFETIME)
+TOKEN_MAX_LIFETIME = getattr(settings, "AUTH_TOKEN_MAX_LIFETIME", 24 * 60 * 60)
+# A token is only renewed in its last quarter
+TOKEN_RENEW_WITHIN = TOKEN_TTL // 4
+# Cached users per process, and how long one may serve stale data
+# (e.g. a deactivation in another process)
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 60
+
+_signer = signing.TimestampSigner(salt="core.authentication.token")
+# enough of the session auth hash to tie a token to the current password
+_AUTH_HASH_LENGTH = 16
+
+
+class UserCache:
+    """
+    Thread-safe LRU of ``pk -> (field values, auth hash)`` with a per-entry
+    TTL. Each ``get`` builds a fresh User from the cached values, so no
+    instance is shared between requests or threads.
+    """
+
+    def __init__(self, size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pk):
+        with self._lock:
+            entry = self._entries.get(pk)
+            if entry is not None and entry[2] > time.monotonic():
+                self._entries.move_to_end(pk)
+                self.hits += 1
+                return User.from_db(DEFAULT_DB_ALIAS, _USER_FIELDS, entry[0]), entry[1]
+            self.misses += 1
+        user = User.objects.filter(pk=pk).first()
+        if user is None:
+            return None
+        auth_hash = user.get_session_auth_hash()[:_AUTH_HASH_LENGTH]
+        values = tuple(getattr(user, name) for name in _USER_FIELDS)
+        with self._lock:
+            self._entries[pk] = (values, auth_hash, time.monotonic() + self.ttl)
+            self._entries.move_to_end(pk)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return user, auth_hash
+
+    def evict(self, pk):
+        with self._lock:
+            self._entries.pop(pk, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
+
+
+_USER_FIELDS = [field.attname for field in User._meta.concrete_fields]
+user_cache = UserCache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _evict_user(sender, instance, **kwargs):
+    # only this process; others catch up within USER_CACHE_TTL
+    user_cache.evict(instance.pk)
+
+
+def issue_token(user, logged_in_at=None):
+    """
+    ``{"token", "expires_in"}`` for ``user``; send it as ``Authorization: Bearer <token>``.
+    ``logged_in_at`` (epoch seconds) is carried over by renewals; default now.
+    """
+    now = int(time.time())
+    logged_in_at = now if logged_in_at is None else logged_in_at
+    value = f"{user.pk}.{user.get_session_auth_hash()[:_AUTH_HASH_LENGTH]}.{logged_in_at}"
+    expires_in = max(0, min(TOKEN_TTL, logged_in_at + TOKEN_MAX_LIFETIME - now))
+    return {"token": _signer.sign(value), "expires_in": expires_in}
+
+
+def _claims(token):
+    """``(user id, auth hash, login time, signing time)`` of a valid, unexpired token, else None."""
+    try:
+        pk, auth_hash, logged_in_at = _signer.unsign(token, max_age=TOKEN_TTL).split(".")
+        # the TimestampSigner timestamp: "<value>:<timestamp>:<signature>"
+        signed_at = signing.b62_decode(token.rsplit(_signer.sep, 2)[1])
+        pk, logged_in_at = int(pk), int(logged_in_at)
+    except (signing.BadSignature, ValueError):
+        return None
+    if time.time() - logged_in_at > TOKEN_MAX_LIFETIME:
+        return None
+    return pk, auth_hash, logged_in_at, signed_at
+
+
+def renew_token(user, token):
+    """
+    A fresh ``issue_token`` for ``token`` once it is within TOKEN_RENEW_WITHIN
+    of expiry, else None. The new token keeps the original login time.
+    """
+    claims = _claims(token)
+    if claims is None or claims[3] + TOKEN_TTL - time.time() > TOKEN_RENEW_WITHIN:
+        return None
+    return issue_token(user, logged_in_at=claims[2])
+
+
+def user_for_token(token):
+    """The active user ``token`` was issued to, or None if it is invalid or expired."""
+    claims = _claims(token)
+    if claims is None:
+        return None
+    pk, auth_hash, _, _ = claims
+    cached = user_cache.get(pk)
+    if cached is None:
+        return None
+    user, current_hash = cached
+    if not user.is_active or not constant_time_compare(auth_hash, current_hash):
+        return None
+    return user
+
+
+def bearer_token(request):
+    """The token from an ``Authorization: Bearer`` header, or None when absent."""
+    header = get_authorization_header(request).split()
+    if not header or header[0].lower() != b"bearer":
+        return None
+    if len(header) != 2:
+        raise AuthenticationFailed("Invalid token header.")
+    try:
+        return header[1].decode()
+    except UnicodeError:
+        raise AuthenticationFailed("Invalid token header.")
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """DRF authentication for tokens from ``issue_token``."""
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        token = bearer_token(request)
+        if token is None:
+            return None
+        user = user_for_token(token)
+        if user is None:
+            raise AuthenticationFailed("Invalid or expired token.")
+        return (user, token)
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,198 @@
+"""
+Benchmark harness: synthetic data plus timed scenarios for the hot paths.
+
+Used by ``manage.py benchmark``, which runs everything inside a throwaway
+test database. Each scenario records wall time, SQL query count and peak
+Python memory (tracemalloc) per call.
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, time as dtime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Streak, SWOTItem, Task, User
+from .services import (
+    generate_scheduled_tasks, generate_tasks_for_date, generate_tasks_for_range, rebuild_daily_stats,
+)
+
+# (frequency, weight) mix for generated SWOT items
+FREQUENCY_MIX = [("daily", 50), ("weekly", 30), ("monthly", 15), ("quarterly", 5)]
+# share of historical tasks marked done
+DONE_RATIO = 0.7
+
+
+# -------------------
+# Synthetic data
+# -------------------
+
+def _random_item(rng, owner_id, today):
+    frequency = rng.choices([f for f, _ in FREQUENCY_MIX], weights=[w for _, w in FREQUENCY_MIX])[0]
+    item = SWOTItem(
+        owner_id=owner_id,
+        type=rng.choice(["strength", "weakness", "opportunity", "threat"]),
+        description=f"habit {rng.randrange(10**6)}",
+        frequency=frequency,
+        # mostly explicit weekday picks, sometimes the created_at fallback
+        dow_mask=rng.choice([0, 0b0011111, 0b1100000, 0b1111111, rng.randrange(1, 128)]),
+        month_day=rng.choice([None, rng.randint(1, 28)]),
+    )
+    created = today - timedelta(days=rng.randrange(365))
+    item.created_at = timezone.make_aware(datetime.combine(created, dtime(rng.randrange(24))))
+    item.next_due = item.recurrence.next_on_or_after(today)
+    return item
+
+
+def build_dataset(users, items_per_user, history_days, seed=0):
+    """
+    Create ``users`` users with ``items_per_user`` SWOT items each and
+    ``history_days`` days of generated tasks (about DONE_RATIO done) and streaks.
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    password = make_password(None)  # unusable; skips hashing per user
+
+    User.objects.bulk_create(
+        [User(email=f"bench{i}@example.com", password=password) for i in range(users)],
+        batch_size=1000,
+    )
+    owner_ids = list(User.objects.filter(email__startswith="bench").values_list("id", flat=True))
+
+    items = [_random_item(rng, owner_id, today) for owner_id in owner_ids for _ in range(items_per_user)]
+    SWOTItem.objects.bulk_create(items, batch_size=1000)
+    # auto_now_add overrides created_at on insert; restore the spread-out values
+    SWOTItem.objects.bulk_update(
+        [SWOTItem(pk=it.pk, created_at=it.created_at) for it in items if it.pk],
+        ["created_at"],
+        batch_size=1000,
+    )
+
+    if history_days:
+        generate_tasks_for_range(today - timedelta(days=history_days), today)
+        task_ids = list(Task.objects.filter(date__lt=today).values_list("id", flat=True))
+        done_ids = rng.sample(task_ids, int(len(task_ids) * DONE_RATIO))
+        for i in range(0, len(done_ids), 1000):
+            Task.objects.filter(pk__in=done_ids[i:i + 1000]).update(status="done", completed_at=timezone.now())
+        rebuild_daily_stats()
+
+    Streak.objects.bulk_create(
+        [Streak(owner_id=owner_id, count=rng.randrange(30), last_day=today - timedelta(days=1)) for owner_id in owner_ids],
+        batch_size=1000,
+    )
+    return owner_ids
+
+
+# -------------------
+# Measurement
+# -------------------
+
+def _measure(fn):
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        fn()
+        wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return wall, len(ctx.captured_queries), peak
+
+
+def _summarize(samples):
+    walls = [s[0] * 1000 for s in samples]
+    return {
+        "calls": len(samples),
+        "wall_ms": {
+            "min": round(min(walls), 3),
+            "median": round(statistics.median(walls), 3),
+            "p95": round(statistics.quantiles(walls, n=20)[-1] if len(walls) > 1 else walls[0], 3),
+            "max": round(max(walls), 3),
+            "total": round(sum(walls), 3),
+        },
+        "queries": {"mean": round(statistics.mean(s[1] for s in samples), 2), "max": max(s[1] for s in samples)},
+        "peak_memory_kb": round(max(s[2] for s in samples) / 1024, 1),
+    }
+
+
+def _client_for(user_id):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(pk=user_id))
+    return client
+
+
+def _expect(response, *codes):
+    if response.status_code not in codes:
+        raise RuntimeError(f"{response.request['PATH_INFO']} returned {response.status_code}")
+
+
+def _request_with_connection_reuse(client, path):
+    # what the WSGI handler does around a request
+    close_old_connections()
+    _expect(client.get(path), 200)
+    close_old_connections()
+
+
+def run_scenarios(owner_ids, sample_users=50, seed=0):
+    """Run every scenario and return ``{name: summary}``."""
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    tomorrow = today + timedelta(days=1)
+    sample = rng.sample(owner_ids, min(sample_users, len(owner_ids)))
+    clients = {user_id: _client_for(user_id) for user_id in sample}
+    results = {}
+    conn_max_age = connection.settings_dict["CONN_MAX_AGE"]
+
+    results["generate_tasks_for_date"] = _summarize([_measure(lambda: generate_tasks_for_date(tomorrow))])
+    results["generate_tasks_for_date (rerun, idempotent)"] = _summarize(
+        [_measure(lambda: generate_tasks_for_date(tomorrow))]
+    )
+    Task.objects.filter(date=tomorrow).delete()
+    results["generate_scheduled_tasks"] = _summarize([_measure(lambda: generate_scheduled_tasks(tomorrow))])
+
+    cache.clear()
+    results["TaskViewSet.list (cold)"] = _summarize(
+        [_measure(lambda c=c: _expect(c.get("/api/tasks/"), 200)) for c in clients.values()]
+    )
+    results["TaskViewSet.list (warm)"] = _summarize(
+        [_measure(lambda c=c: _expect(c.get("/api/tasks/"), 200)) for c in clients.values()]
+    )
+
+    # connect per request vs. a persistent connection. The test client skips
+    # the request_started/finished connection handling, so it is done here;
+    # an in-memory SQLite test database would not survive a reconnect.
+    if not (connection.vendor == "sqlite" and connection.is_in_memory_db()):
+        for label, max_age in (("unpooled, CONN_MAX_AGE=0", 0), ("persistent", 600)):
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = max_age
+            cache.clear()  # cold reads, so every request uses the connection
+            results[f"TaskViewSet.list ({label})"] = _summarize(
+                [_measure(lambda c=c: _request_with_connection_reuse(c, "/api/tasks/")) for c in clients.values()]
+            )
+        connection.close()
+        connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+
+    pending = dict(
+        Task.objects.filter(owner_id__in=sample, date=today, status="pending")
+        .values_list("owner_id", "id")
+    )
+    if pending:
+        results["TaskViewSet.done"] = _summarize(
+            [
+                _measure(lambda c=clients[user_id], pk=pk: _expect(c.post(f"/api/tasks/{pk}/done/"), 200))
+                for user_id, pk in pending.items()
+            ]
+        )
+    year_ago = (today - timedelta(days=364)).isoformat()
+    results["TaskViewSet.summary (year)"] = _summarize(
+        [_measure(lambda c=c: _expect(c.get(f"/api/tasks/summary/?start={year_ago}"), 200)) for c in clients.values()]
+    )
+    results["streak_view"] = _summarize(
+        [_measure(lambda c=c: _expect(c.get("/api/streak/"), 200)) for c in clients.values()]
+    )
+    return results
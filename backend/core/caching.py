@@ -0,0 +1,101 @@
+"""
+Cached API payloads, backed by Django's cache framework
+(locmem in dev/tests, Redis in production).
+"""
+import time
+
+from django.core.cache import cache
+
+# Serialized per-user-per-day task lists, keyed by the user's "tasks"
+# revision read *before* the list was queried. A write bumps the revision,
+# so a list read before the write but cached after it is never served; the
+# timeout only bounds how long unreachable entries linger.
+TASK_LIST_TIMEOUT = 60 * 60
+
+_HITS_KEY = "stats:task_list:hits"
+_MISSES_KEY = "stats:task_list:misses"
+
+
+def _task_list_key(owner_id, day, revision):
+    return f"task_list:{owner_id}:{revision}:{day.isoformat()}"
+
+
+def _revision_key(owner_id, scope):
+    return f"rev:{scope}:{owner_id}"
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:  # first use (or evicted)
+        cache.add(key, 1, timeout=None)
+
+
+def get_task_list(owner_id, day, revision):
+    """
+    Return the cached serialized task list for ``(owner_id, day)`` at
+    ``revision`` (from ``get_revision(owner_id, "tasks")``), or None.
+    """
+    data = cache.get(_task_list_key(owner_id, day, revision))
+    _incr(_MISSES_KEY if data is None else _HITS_KEY)
+    return data
+
+
+def set_task_list(owner_id, day, revision, data):
+    """Cache ``data``; ``revision`` must have been read before the query that built it."""
+    cache.set(_task_list_key(owner_id, day, revision), list(data), TASK_LIST_TIMEOUT)
+
+
+def invalidate_task_lists(pairs):
+    """
+    Bump the "tasks" revision of the owners in an iterable of
+    ``(owner_id, day)`` pairs, which orphans all their cached lists.
+    """
+    bump_revisions({owner_id for owner_id, _ in pairs}, "tasks")
+
+
+# Per-user revision stamps back conditional GETs (ETag / If-None-Match).
+# Bumping deletes the stamp; the next read seeds a fresh, never-reused value,
+# so an evicted key can't make a stale ETag match again.
+
+def get_revision(owner_id, scope):
+    key = _revision_key(owner_id, scope)
+    revision = cache.get(key)
+    if revision is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        revision = cache.get(key)
+    return revision
+
+
+def bump_revisions(owner_ids, *scopes):
+    keys = {_revision_key(owner_id, scope) for owner_id in owner_ids for scope in scopes}
+    if keys:
+        cache.delete_many(keys)
+
+
+# Lazily generated days: a marker per (owner, day) so reads skip the DB check.
+# Keyed by the "swot" revision, so any SWOT item change clears them.
+MATERIALIZED_TIMEOUT = 2 * 24 * 60 * 60
+
+
+def _materialized_key(owner_id, day):
+    return f"materialized:{owner_id}:{get_revision(owner_id, 'swot')}:{day.isoformat()}"
+
+
+def is_day_materialized(owner_id, day):
+    return cache.get(_materialized_key(owner_id, day)) is not None
+
+
+def mark_day_materialized(owner_id, day):
+    cache.set(_materialized_key(owner_id, day), 1, MATERIALIZED_TIMEOUT)
+
+
+def cache_stats():
+    hits = cache.get(_HITS_KEY, 0)
+    misses = cache.get(_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
@@ -0,0 +1,42 @@
+"""
+Database backends: Django's own, plus connection metrics.
+
+Set ENGINE to ``core.db_backends.postgresql`` (or ``.sqlite3``). Connect
+time, reuse across requests and health-check results are recorded in
+``core.metrics`` and reported by /api/metrics/.
+"""
+import time
+
+from core import metrics
+
+
+class InstrumentedConnectionMixin:
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        metrics.connection_opened(time.perf_counter() - start)
+        return connection
+
+    def _close(self):
+        had_connection = self.connection is not None
+        super()._close()
+        if had_connection:
+            metrics.connection_closed()
+
+    def is_usable(self):
+        usable = super().is_usable()
+        metrics.connection_health_checked(usable)
+        return usable
+
+    def close_if_unusable_or_obsolete(self):
+        # called at request/task boundaries (start and end); a connection
+        # that survives counts as reused once the next request touches it
+        self._kept = False  # the check itself goes through ensure_connection
+        super().close_if_unusable_or_obsolete()
+        self._kept = self.connection is not None
+
+    def ensure_connection(self):
+        if self.connection is not None and getattr(self, "_kept", False):
+            self._kept = False
+            metrics.connection_reused()
+        super().ensure_connection()
@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from core.db_backends import InstrumentedConnectionMixin
+
+
+class DatabaseWrapper(InstrumentedConnectionMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,67 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.benchmark import build_dataset, run_scenarios
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark task generation, dashboard reads and completions on synthetic data "
+        "(in a throwaway test database) and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--items", type=int, default=15, help="SWOT items per user")
+        parser.add_argument("--days", type=int, default=30, help="Days of task history")
+        parser.add_argument("--sample", type=int, default=50, help="Users exercised per API scenario")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", type=str, default="benchmark.json")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(
+                f"Building dataset: {options['users']} users x {options['items']} items, "
+                f"{options['days']} days of history"
+            )
+            owner_ids = build_dataset(options["users"], options["items"], options["days"], options["seed"])
+            results = run_scenarios(owner_ids, options["sample"], options["seed"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "params": {k: options[k] for k in ("users", "items", "days", "sample", "seed")},
+            },
+            "results": results,
+        }
+        with open(options["output"], "w") as fh:
+            json.dump(report, fh, indent=2)
+
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:48} median {summary['wall_ms']['median']:>9.3f} ms  "
+                f"queries {summary['queries']['mean']:>6}  peak {summary['peak_memory_kb']:>9} KB"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
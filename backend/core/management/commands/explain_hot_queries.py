@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from core.models import DailyStats, SWOTItem, Task, User
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN (ANALYZE on PostgreSQL) for the dashboard and generation hot queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", type=str, help="User to explain for (default: the user with most tasks)")
+        parser.add_argument("--date", type=str, help="YYYY-MM-DD (default: today)")
+
+    def handle(self, *args, **options):
+        target = (
+            datetime.strptime(options["date"], "%Y-%m-%d").date()
+            if options.get("date")
+            else timezone.localdate()
+        )
+        user = self.get_user(options.get("email"))
+        swot_ids = list(SWOTItem.objects.filter(owner=user).values_list("id", flat=True)[:1000])
+
+        queries = {
+            "TaskViewSet.list": Task.objects.filter(owner=user, date=target).order_by("created_at"),
+            "TaskViewSet.summary": DailyStats.objects.filter(
+                owner=user, date__range=(target - timedelta(days=6), target)
+            ).values_list("date", "done", "total", "value_sum"),
+            "pending tasks for the day": Task.objects.filter(owner=user, date=target, status="pending"),
+            "generation: SWOTItem.objects.due_on": SWOTItem.objects.due_on(target).only(
+                "id", "owner_id", "type", "description"
+            ),
+            "generation: next_due index (nightly)": SWOTItem.objects.filter(
+                active=True, next_due__lte=target
+            ).for_generation(),
+            "generation: existing tasks check": Task.objects.filter(
+                swot_item_id__in=swot_ids, date__in=[target]
+            ).order_by().values_list("swot_item_id", "date"),
+        }
+
+        # ANALYZE actually runs the query; only PostgreSQL supports it here.
+        explain_options = {"analyze": True, "buffers": True} if connection.vendor == "postgresql" else {}
+        for name, qs in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+            self.stdout.write(qs.explain(**explain_options))
+            self.stdout.write("")
+
+    def get_user(self, email):
+        if email:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {email}")
+        user = User.objects.annotate(n=Count("tasks")).order_by("-n").first()
+        if user is None:
+            raise CommandError("No users in the database")
+        return user
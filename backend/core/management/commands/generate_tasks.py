@@ -1,18 +1,59 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from datetime import datetime, timedelta
-from core.services import generate_tasks_for_date
+from core.services import generate_tasks_for_date, generate_tasks_for_range
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+
 
 class Command(BaseCommand):
-    help = "Generate tasks for a date (default: tomorrow)"
+    help = "Generate tasks for a date (default: tomorrow) or a range of dates"
 
     def add_arguments(self, parser):
         parser.add_argument("--date", type=str, help="YYYY-MM-DD (default: tomorrow)")
+        parser.add_argument("--start", type=str, help="First date of a range, YYYY-MM-DD (default: tomorrow)")
+        parser.add_argument("--end", type=str, help="Last date of a range (inclusive), YYYY-MM-DD")
+        parser.add_argument("--days", type=int, help="Number of days to generate, starting at --start")
 
     def handle(self, *args, **options):
+        if options["start"] or options["end"] or options["days"]:
+            return self.handle_range(options)
+
         if options.get("date"):
-            target = datetime.strptime(options["date"], "%Y-%m-%d").date()
+            target = _parse_date(options["date"])
         else:
             target = timezone.localdate() + timedelta(days=1)
-        created = generate_tasks_for_date(target)
-        self.stdout.write(self.style.SUCCESS(f"Generated {created} tasks for {target}"))
+        result = generate_tasks_for_date(target)
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {result['created']} tasks for {target} ({result['skipped']} already existed)"
+        ))
+
+    def handle_range(self, options):
+        if options["date"]:
+            raise CommandError("--date can't be combined with --start/--end/--days")
+        if options["end"] and options["days"]:
+            raise CommandError("Use either --end or --days, not both")
+
+        start = _parse_date(options["start"]) if options["start"] else timezone.localdate() + timedelta(days=1)
+        if options["days"]:
+            if options["days"] < 1:
+                raise CommandError("--days must be at least 1")
+            end = start + timedelta(days=options["days"] - 1)
+        else:
+            end = _parse_date(options["end"]) if options["end"] else start
+        if end < start:
+            raise CommandError("--end must not be before --start")
+
+        def progress(frequency, created, skipped):
+            self.stdout.write(f"  {frequency}: +{created} created, {skipped} skipped")
+
+        self.stdout.write(f"Generating tasks for {start} .. {end}")
+        result = generate_tasks_for_range(start, end, progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {result['created']} tasks for {start} .. {end} ({result['skipped']} already existed)"
+        ))
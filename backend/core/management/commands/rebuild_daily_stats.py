@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User
+from core.services import rebuild_daily_stats
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailyStats rollup from tasks (all users and dates by default)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", type=str, help="Only rebuild this user's rows")
+        parser.add_argument("--start", type=str, help="First date to rebuild, YYYY-MM-DD")
+        parser.add_argument("--end", type=str, help="Last date to rebuild (inclusive), YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        owner_ids = None
+        if options["email"]:
+            owner_ids = list(User.objects.filter(email=options["email"]).values_list("id", flat=True))
+            if not owner_ids:
+                raise CommandError(f"No user with email {options['email']}")
+        start = _parse_date(options["start"]) if options["start"] else None
+        end = _parse_date(options["end"]) if options["end"] else None
+        if start and end and end < start:
+            raise CommandError("--end must not be before --start")
+
+        written = rebuild_daily_stats(owner_ids=owner_ids, start=start, end=end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} daily stats rows"))
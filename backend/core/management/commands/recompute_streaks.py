@@ -0,0 +1,56 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django_q.models import Schedule
+from django_q.tasks import schedule
+
+from core.models import User
+from core.streaks import STREAK_BATCH_SIZE, recompute_streaks
+
+CHECK_FUNC = "core.streaks.nightly_streak_check"
+
+
+class Command(BaseCommand):
+    help = "Recompute streaks from completed tasks and fix any that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", type=str, help="Only check this user")
+        parser.add_argument("--dry-run", action="store_true", help="Report mismatches without fixing them")
+        parser.add_argument("--batch-size", type=int, default=STREAK_BATCH_SIZE, help="Users per query")
+        parser.add_argument(
+            "--schedule",
+            action="store_true",
+            help="Instead of running now, schedule a nightly check with django-q",
+        )
+
+    def handle(self, *args, **options):
+        if options["schedule"]:
+            return self.handle_schedule()
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        owner_ids = None
+        if options["email"]:
+            owner_ids = list(User.objects.filter(email=options["email"]).values_list("id", flat=True))
+            if not owner_ids:
+                raise CommandError(f"No user with email {options['email']}")
+
+        result = recompute_streaks(owner_ids, batch_size=options["batch_size"], dry_run=options["dry_run"])
+        for owner_id, stored, derived in result["sample"]:
+            self.stdout.write(f"  user {owner_id}: stored {stored[0]} (last {stored[1]}), history {derived[0]} (last {derived[1]})")
+        verb = "would fix" if options["dry_run"] else "fixed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {result['checked']} users: {result['mismatched']} mismatched, "
+            f"{verb} {result['mismatched'] if options['dry_run'] else result['fixed']}"
+        ))
+
+    def handle_schedule(self):
+        if Schedule.objects.filter(func=CHECK_FUNC).exists():
+            self.stdout.write(self.style.WARNING("Schedule already exists"))
+            return
+        now = timezone.localtime()
+        # after midnight, once yesterday's completions are final
+        next_dt = timezone.make_aware(datetime.combine(now.date() + timedelta(days=1), time(0, 30)))
+        schedule(CHECK_FUNC, schedule_type="D", next_run=next_dt, repeats=-1, name="streak_check_daily")
+        self.stdout.write(self.style.SUCCESS(f"Scheduled {CHECK_FUNC} daily starting {next_dt}"))
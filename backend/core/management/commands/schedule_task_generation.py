@@ -1,24 +1,60 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from datetime import datetime, time, timedelta
 from django_q.tasks import schedule
 from django_q.models import Schedule
 
+DAILY_FUNC = "core.services.generate_tasks_for_tomorrow"
+SHARDED_FUNC = "core.services.generate_tasks_for_tomorrow_sharded"
+ROLLING_FUNC = "core.services.generate_tasks_for_timezones"
+
+
 class Command(BaseCommand):
     help = "Create or ensure a daily schedule that runs generate_tasks_for_tomorrow"
 
+    def add_arguments(self, parser):
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            "--sharded",
+            action="store_true",
+            help="Fan generation out across django-q workers (one task per shard)",
+        )
+        mode.add_argument(
+            "--hourly",
+            action="store_true",
+            help="Rolling generation: run every hour for users whose local midnight is next",
+        )
+        mode.add_argument("--minutes", type=int, help="Like --hourly, but every N minutes")
+        parser.add_argument("--shards", type=int, help="Shard count (default: Q_CLUSTER workers)")
+
     def handle(self, *args, **options):
-        func_path = "core.services.generate_tasks_for_tomorrow"
-        # don't create duplicate schedule if it exists
-        if Schedule.objects.filter(func=func_path).exists():
+        # don't create duplicate schedule if it exists (in any mode)
+        if Schedule.objects.filter(func__in=[DAILY_FUNC, SHARDED_FUNC, ROLLING_FUNC]).exists():
             self.stdout.write(self.style.WARNING("Schedule already exists"))
             return
+        if options["hourly"] or options["minutes"] is not None:
+            return self.schedule_rolling(60 if options["minutes"] is None else options["minutes"])
 
+        func_path = SHARDED_FUNC if options["sharded"] else DAILY_FUNC
         now = timezone.localtime()
         # next run at 23:30 local time (adjust as you like)
         next_dt = timezone.make_aware(datetime.combine(now.date(), time(23, 30)))
         if next_dt <= now:
             next_dt += timedelta(days=1)
 
-        schedule(func_path, schedule_type="D", next_run=next_dt, repeats=-1, name="generate_tasks_daily")
+        func_args = [options["shards"]] if options["sharded"] and options["shards"] else []
+        schedule(func_path, *func_args, schedule_type="D", next_run=next_dt, repeats=-1, name="generate_tasks_daily")
         self.stdout.write(self.style.SUCCESS(f"Scheduled {func_path} daily starting {next_dt}"))
+
+    def schedule_rolling(self, minutes):
+        if not 1 <= minutes <= 60:
+            raise CommandError("--minutes must be between 1 and 60")
+        # start on the next interval boundary
+        now = timezone.now().replace(second=0, microsecond=0)
+        next_dt = now + timedelta(minutes=minutes - now.minute % minutes)
+        schedule(
+            ROLLING_FUNC, minutes,
+            schedule_type=Schedule.MINUTES, minutes=minutes,
+            next_run=next_dt, repeats=-1, name="generate_tasks_rolling",
+        )
+        self.stdout.write(self.style.SUCCESS(f"Scheduled {ROLLING_FUNC} every {minutes} min starting {next_dt}"))
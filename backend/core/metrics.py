@@ -0,0 +1,170 @@
+"""
+Per-request API metrics: SQL query count, DB time, serializer time and wall
+time, collected by ``core.middleware.APIMetricsMiddleware`` (opt-in).
+
+Histograms are kept per process; the metrics endpoint reports the process
+that served it. Database connection gauges (fed by core.db_backends) are
+per process too.
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# wall-time histogram bucket upper bounds, in ms (last bucket is open-ended)
+WALL_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current = contextvars.ContextVar("api_request_metrics", default=None)
+_lock = threading.Lock()
+_views = {}
+
+
+class RequestMetrics:
+    __slots__ = ("queries", "db_time", "serializer_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting queries and their time."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def serializer_timer():
+    """Attribute the enclosed block to the current request's serializer time."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - start
+
+
+def observe(view, metrics, wall):
+    wall_ms = wall * 1000
+    bucket = next((i for i, bound in enumerate(WALL_BUCKETS_MS) if wall_ms <= bound), len(WALL_BUCKETS_MS))
+    with _lock:
+        stats = _views.get(view)
+        if stats is None:
+            stats = _views[view] = {
+                "count": 0,
+                "wall_ms_total": 0.0,
+                "db_ms_total": 0.0,
+                "serializer_ms_total": 0.0,
+                "queries_total": 0,
+                "queries_max": 0,
+                "wall_ms_buckets": [0] * (len(WALL_BUCKETS_MS) + 1),
+            }
+        stats["count"] += 1
+        stats["wall_ms_total"] += wall_ms
+        stats["db_ms_total"] += metrics.db_time * 1000
+        stats["serializer_ms_total"] += metrics.serializer_time * 1000
+        stats["queries_total"] += metrics.queries
+        stats["queries_max"] = max(stats["queries_max"], metrics.queries)
+        stats["wall_ms_buckets"][bucket] += 1
+
+
+# -------------------
+# Database connections
+# -------------------
+
+_connections = {
+    "opened": 0,
+    "closed": 0,
+    "reused": 0,
+    "connect_ms_total": 0.0,
+    "connect_ms_max": 0.0,
+    "health_checks": 0,
+    "health_check_failures": 0,
+}
+
+
+def connection_opened(seconds):
+    with _lock:
+        _connections["opened"] += 1
+        _connections["connect_ms_total"] += seconds * 1000
+        _connections["connect_ms_max"] = max(_connections["connect_ms_max"], seconds * 1000)
+
+
+def connection_closed():
+    with _lock:
+        _connections["closed"] += 1
+
+
+def connection_reused():
+    with _lock:
+        _connections["reused"] += 1
+
+
+def connection_health_checked(usable):
+    with _lock:
+        _connections["health_checks"] += 1
+        _connections["health_check_failures"] += not usable
+
+
+def connection_snapshot():
+    """
+    Connection gauges for this process. ``open`` is the live connection
+    count (one per thread that has used the DB); ``checkouts`` counts
+    request/task starts served by a new or a reused connection, and
+    ``connect_ms_mean`` is the wait when a new one had to be opened.
+    """
+    with _lock:
+        stats = dict(_connections)
+    opened = stats["opened"]
+    return {
+        "pid": os.getpid(),
+        "role": settings.DB_PROCESS_ROLE,
+        "conn_max_age": settings.DB_CONN_MAX_AGE,
+        "open": opened - stats["closed"],
+        "opened": opened,
+        "closed": stats["closed"],
+        "checkouts": opened + stats["reused"],
+        "reuse_ratio": round(stats["reused"] / (opened + stats["reused"]), 4) if opened + stats["reused"] else None,
+        "connect_ms_mean": round(stats["connect_ms_total"] / opened, 3) if opened else None,
+        "connect_ms_max": round(stats["connect_ms_max"], 3),
+        "health_checks": stats["health_checks"],
+        "health_check_failures": stats["health_check_failures"],
+    }
+
+
+def snapshot():
+    """Aggregated per-view stats for this process."""
+    labels = [f"<={bound}" for bound in WALL_BUCKETS_MS] + [f">{WALL_BUCKETS_MS[-1]}"]
+    views = {}
+    with _lock:
+        for view, stats in _views.items():
+            count = stats["count"]
+            views[view] = {
+                "count": count,
+                "wall_ms_mean": round(stats["wall_ms_total"] / count, 3),
+                "db_ms_mean": round(stats["db_ms_total"] / count, 3),
+                "serializer_ms_mean": round(stats["serializer_ms_total"] / count, 3),
+                "queries_mean": round(stats["queries_total"] / count, 2),
+                "queries_max": stats["queries_max"],
+                "wall_ms_histogram": dict(zip(labels, stats["wall_ms_buckets"])),
+            }
+    return {"pid": os.getpid(), "views": views}
@@ -0,0 +1,67 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _view_name(view_func, request):
+    """``TaskViewSet.list``, ``LoginView``, ``streak_view``...; None for non-DRF views."""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return None
+    actions = getattr(view_func, "actions", None)
+    if actions:
+        method = request.method.lower()
+        return f"{cls.__name__}.{actions.get(method, method)}"
+    return cls.__name__
+
+
+class APIMetricsMiddleware:
+    """
+    Record SQL query count, DB time, serializer time and wall time for every
+    DRF view. Adds a ``Server-Timing`` header, feeds the histograms behind
+    ``/api/metrics/`` and logs requests over API_METRICS_QUERY_BUDGET queries.
+    Enabled with API_METRICS=1 (see config/settings.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = getattr(settings, "API_METRICS_QUERY_BUDGET", None)
+
+    def __call__(self, request):
+        request_metrics, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(request_metrics.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        wall = time.perf_counter() - start
+
+        view = getattr(request, "_metrics_view", None)
+        if view is None:
+            return response
+
+        response["Server-Timing"] = (
+            f'db;dur={request_metrics.db_time * 1000:.2f};desc="{request_metrics.queries} queries", '
+            f"serializer;dur={request_metrics.serializer_time * 1000:.2f}, "
+            f"total;dur={wall * 1000:.2f}"
+        )
+        metrics.observe(view, request_metrics, wall)
+        if self.query_budget and request_metrics.queries > self.query_budget:
+            logger.warning(
+                "%s %s (%s) ran %d queries (budget %d), %.1f ms",
+                request.method, request.path, view, request_metrics.queries, self.query_budget, wall * 1000,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = _view_name(view_func, request)
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:03
+
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_alter_swotitem_options_swotitem_dow_mask_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='swotitem',
+            index=models.Index(condition=models.Q(('active', True)), fields=['frequency'], name='swotitem_active_freq_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['owner', 'date', 'created_at'], name='task_owner_date_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['owner', 'date'], name='task_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_task_swotitem_indexes'),
+    ]
+
+    operations = [
+        # nullable, no default: a catalog-only change, so the table lock is brief
+        migrations.AddField(
+            model_name='swotitem',
+            name='next_due',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
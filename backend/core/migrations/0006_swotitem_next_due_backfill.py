@@ -0,0 +1,51 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:07
+
+from collections import defaultdict
+
+from django.db import migrations, models, transaction
+from django.utils import timezone
+
+from core.migration_operations import AddIndexConcurrently
+from core.recurrence import Recurrence
+
+BATCH_SIZE = 2000
+
+
+def populate_next_due(apps, schema_editor):
+    # Every item, inactive ones too: reactivating an item doesn't recompute it
+    SWOTItem = apps.get_model("core", "SWOTItem")
+    today = timezone.localdate()
+    last_pk = 0
+    while True:
+        batch = list(
+            SWOTItem.objects.filter(pk__gt=last_pk).order_by("pk")
+            .only("pk", "frequency", "dow_mask", "month_day", "created_at")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        by_next_due = defaultdict(list)
+        for item in batch:
+            by_next_due[Recurrence.compile(item).next_on_or_after(today)].append(item.pk)
+        # one short transaction per batch, so row locks are never held for long
+        with transaction.atomic(using=schema_editor.connection.alias):
+            for next_due, pks in by_next_due.items():
+                SWOTItem.objects.filter(pk__in=pks).update(next_due=next_due)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+    # batches commit as they go, and CREATE INDEX CONCURRENTLY can't run
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0005_swotitem_next_due'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_next_due, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='swotitem',
+            index=models.Index(condition=models.Q(('active', True)), fields=['next_due'], name='swotitem_active_next_due_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction, and building
+    # these apart from the ADD COLUMN migration keeps its lock short
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_sync_updated_at_tombstones'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='swotitem',
+            index=models.Index(fields=['owner', 'updated_at'], name='swotitem_owner_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['owner', 'updated_at'], name='task_owner_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:13
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def populate_daily_stats(apps, schema_editor):
+    Task = apps.get_model("core", "Task")
+    DailyStats = apps.get_model("core", "DailyStats")
+    rows = (
+        Task.objects.order_by()
+        .values("owner_id", "date")
+        .annotate(
+            total=Count("id"),
+            done=Count("id", filter=Q(status="done")),
+            value_sum=Coalesce(Sum("value", filter=Q(status="done")), 0.0),
+        )
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    for row in rows:
+        batch.append(DailyStats(**row))
+        if len(batch) >= 1000:
+            DailyStats.objects.bulk_create(batch)
+            batch = []
+    DailyStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_sync_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('done', models.PositiveIntegerField(default=0)),
+                ('value_sum', models.FloatField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('owner', 'date')},
+            },
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
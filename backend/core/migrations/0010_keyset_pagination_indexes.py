@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently, RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0009_dailystats'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='swotitem',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='swotitem_owner_created_idx'),
+        ),
+        # build the replacement before dropping the old index, so the
+        # dashboard query is never left without one
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['owner', 'date', 'created_at', 'id'], name='task_owner_date_created_new'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='task',
+            name='task_owner_date_created_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='task',
+            new_name='task_owner_date_created_idx',
+            old_name='task_owner_date_created_new',
+        ),
+    ]
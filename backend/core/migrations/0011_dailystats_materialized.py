@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailystats',
+            name='materialized',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_dailystats_materialized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='timezone',
+            field=models.CharField(db_index=True, default='UTC', max_length=64),
+        ),
+    ]
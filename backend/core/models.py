@@ -1,8 +1,15 @@
-from django.db import models
+from collections import defaultdict
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .recurrence import Recurrence, quarter_of
 
 User = settings.AUTH_USER_MODEL
 # Create your models here.
@@ -30,11 +37,122 @@ class UserManager(BaseUserManager):
 class User(AbstractUser):
     username = None
     email = models.EmailField(unique=True)
+    # IANA name; rolling generation picks users by it (see services)
+    timezone = models.CharField(max_length=64, default="UTC", db_index=True)
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
     objects = UserManager()
 
+    @property
+    def zoneinfo(self):
+        """The user's timezone (the server's if the stored name is unknown)."""
+        try:
+            return ZoneInfo(self.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            return timezone.get_default_timezone()
+
+    def local_today(self):
+        """Today in the user's timezone: the day their tasks and streak run on."""
+        return timezone.localdate(timezone=self.zoneinfo)
+
+
+
+
+class SWOTItemQuerySet(models.QuerySet):
+    # SWOTItem.next_due is derived from these; writing any of them in bulk
+    # recomputes it (save() does the same for single items)
+    SCHEDULE_FIELDS = frozenset(Recurrence.FIELDS)
+
+    def refresh_next_due(self):
+        """Recompute ``next_due`` from today for every item in the queryset."""
+        today = timezone.localdate()
+        by_next_due = defaultdict(list)
+        for item in self.only("pk", *Recurrence.FIELDS):
+            by_next_due[item.recurrence.next_on_or_after(today)].append(item.pk)
+        # one UPDATE per distinct date
+        for next_due, pks in by_next_due.items():
+            self.model.objects.filter(pk__in=pks).update(next_due=next_due)
+
+    def update(self, **kwargs):
+        if "next_due" in kwargs or self.SCHEDULE_FIELDS.isdisjoint(kwargs):
+            return super().update(**kwargs)
+        # the filter may stop matching once the fields change
+        pks = list(self.values_list("pk", flat=True))
+        with transaction.atomic(using=self.db):
+            rows = super().update(**kwargs)
+            self.model.objects.filter(pk__in=pks).refresh_next_due()
+        return rows
 
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        today = timezone.localdate()
+        for obj in objs:
+            if obj.next_due is None:
+                obj.next_due = obj.recurrence.next_on_or_after(today)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            if "next_due" not in fields and not self.SCHEDULE_FIELDS.isdisjoint(fields):
+                # objs may be partial (pk + changed fields): recompute from the rows
+                self.model.objects.filter(pk__in=[obj.pk for obj in objs]).refresh_next_due()
+        return rows
+
+    def for_generation(self):
+        """Load only what task generation reads: the task label and the recurrence fields."""
+        return self.only("id", "owner_id", "type", "description", *Recurrence.FIELDS)
+
+    def due_on(self, target_date):
+        """
+        Active items that should generate a task on ``target_date``.
+        SQL counterpart of ``services.should_create_for``.
+        """
+        weekday = target_date.weekday()  # 0=Mon, 6=Sun
+        day_matches = Q(month_day=target_date.day) | (
+            (Q(month_day__isnull=True) | Q(month_day=0)) & Q(created_at__day=target_date.day)
+        )
+        weekly = Q(dow_bit__gt=0) | Q(dow_mask=0, created_at__iso_week_day=weekday + 1)
+        quarter = quarter_of(target_date.month)
+
+        return (
+            self.filter(active=True)
+            .alias(dow_bit=F("dow_mask").bitand(1 << weekday))
+            .filter(
+                Q(frequency="daily")
+                | (Q(frequency="weekly") & weekly)
+                | (Q(frequency="monthly") & day_matches)
+                | (Q(frequency="quarterly") & day_matches & Q(created_at__quarter=quarter))
+            )
+        )
+
+    def due_between(self, start, end):
+        """
+        Active items due on at least one date in ``start..end`` (inclusive).
+        Quarterly matches are a superset; callers expand exact dates per item.
+        """
+        dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        weekdays = {d.weekday() for d in dates}
+        days = {d.day for d in dates}
+        quarters = {quarter_of(d.month) for d in dates}
+        dow_bits = sum(1 << wd for wd in weekdays)
+
+        day_matches = Q(month_day__in=days) | (
+            (Q(month_day__isnull=True) | Q(month_day=0)) & Q(created_at__day__in=days)
+        )
+        weekly = Q(dow_bits__gt=0) | Q(dow_mask=0, created_at__iso_week_day__in=[wd + 1 for wd in weekdays])
+
+        return (
+            self.filter(active=True)
+            .alias(dow_bits=F("dow_mask").bitand(dow_bits))
+            .filter(
+                Q(frequency="daily")
+                | (Q(frequency="weekly") & weekly)
+                | (Q(frequency="monthly") & day_matches)
+                | (Q(frequency="quarterly") & day_matches & Q(created_at__quarter__in=quarters))
+            )
+        )
 
 
 class SWOTItem(models.Model):
@@ -62,6 +180,39 @@ class SWOTItem(models.Model):
     month_day = models.PositiveSmallIntegerField(null=True, blank=True)
     active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # next date this item is due on (>= the last generated date; None = never).
+    # Kept in step by save() and by SWOTItemQuerySet's update/bulk_create/
+    # bulk_update, and advanced by nightly generation. Raw SQL that changes
+    # the schedule fields must call SWOTItem.objects.filter(...).refresh_next_due(),
+    # or generate_scheduled_tasks will skip or re-fire the item.
+    next_due = models.DateField(null=True, blank=True)
+
+    objects = SWOTItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # generation scans only active items, by recurrence class
+            models.Index(fields=["frequency"], condition=Q(active=True), name="swotitem_active_freq_idx"),
+            # nightly generation: WHERE active AND next_due <= :date
+            models.Index(fields=["next_due"], condition=Q(active=True), name="swotitem_active_next_due_idx"),
+            # keyset pagination of one user's items
+            models.Index(fields=["owner", "created_at", "id"], name="swotitem_owner_created_idx"),
+            # incremental sync: changes since a cursor
+            models.Index(fields=["owner", "updated_at"], name="swotitem_owner_updated_idx"),
+        ]
+
+    @property
+    def recurrence(self) -> Recurrence:
+        return Recurrence.compile(self)
+
+    def save(self, *args, **kwargs):
+        # Schedule fields may have changed: recompute from today
+        self.next_due = self.recurrence.next_on_or_after(timezone.localdate())
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "next_due"}
+        super().save(*args, **kwargs)
 
 
 
@@ -80,10 +231,18 @@ class Task(models.Model):
     value = models.FloatField(null=True, blank=True, validators=[MinValueValidator(0.0)])
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # bulk .update() calls must set this explicitly
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = [("owner", "swot_item", "date", "label")]
         ordering = ["-date", "-created_at"]
+        indexes = [
+            # dashboard: one user's day, in creation order (and its keyset pagination)
+            models.Index(fields=["owner", "date", "created_at", "id"], name="task_owner_date_created_idx"),
+            models.Index(fields=["owner", "date"], condition=Q(status="pending"), name="task_pending_idx"),
+            models.Index(fields=["owner", "updated_at"], name="task_owner_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.date} | {self.label} ({self.status})"
@@ -93,6 +252,47 @@ class Streak(models.Model):
     owner = models.OneToOneField(User, on_delete=models.CASCADE, related_name="streak")
     count = models.PositiveIntegerField(default=0)
     last_day = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.owner} streak={self.count}"
+
+
+class DailyStats(models.Model):
+    """
+    Per-user, per-day task rollup so progress charts cost O(days), not
+    O(tasks). Kept in step by the write paths in services; the
+    ``rebuild_daily_stats`` command repairs drift.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_stats")
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+    # sum of Task.value over done tasks
+    value_sum = models.FloatField(default=0)
+    # every due task for the day exists (lazy generation, see services)
+    materialized = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = [("owner", "date")]
+
+    def __str__(self):
+        return f"{self.owner} {self.date}: {self.done}/{self.total}"
+
+
+class SyncTombstone(models.Model):
+    """Marks a deleted row so incremental sync can tell clients to drop it."""
+    MODEL_CHOICES = [
+        ("task", "Task"),
+        ("swot", "SWOT item"),
+    ]
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sync_tombstones")
+    model = models.CharField(max_length=8, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "deleted_at"], name="tombstone_owner_deleted_idx"),
+        ]
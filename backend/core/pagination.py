@@ -0,0 +1,105 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are selected with ``WHERE (a, b, id) > (last row)`` rather than
+OFFSET, so page N costs one index range scan, the same as page 1. It is
+opt-in: a request without ``page_size`` or ``cursor`` gets the full,
+unpaginated list as before.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    # ascending sort key; must end with a unique field
+    ordering = ("created_at", "id")
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor."
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.page_size_query_param in params or self.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor, queryset.model)))
+        rows = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _after(self, position):
+        """(a, b, c) > (x, y, z) as ``a >= x AND (a > x OR a = x AND b > y OR ...)``."""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            equal = {f: position[f] for f in self.ordering[:i]}
+            condition |= Q(**equal, **{f"{field}__gt": position[field]})
+        # the leading bound on its own keeps the scan a plain index range
+        first = self.ordering[0]
+        return Q(**{f"{first}__gte": position[first]}) & condition
+
+    def encode_cursor(self, instance):
+        meta = instance._meta
+        position = [meta.get_field(f).value_to_string(instance) for f in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor, model):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError(cursor)
+            return {f: model._meta.get_field(f).to_python(v) for f, v in zip(self.ordering, values)}
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+        return replace_query_param(url, self.page_size_query_param, self.page_size)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class TaskKeysetPagination(KeysetPagination):
+    ordering = ("date", "created_at", "id")
+
+
+class SWOTItemKeysetPagination(KeysetPagination):
+    ordering = ("created_at", "id")
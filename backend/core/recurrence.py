@@ -0,0 +1,85 @@
+"""
+Compiled SWOT item schedules.
+
+``Recurrence.compile(swot)`` resolves an item's frequency, ``dow_mask``,
+``month_day`` and ``created_at`` fallbacks once, so matching a date (or
+finding the next due date) is a couple of integer comparisons.
+"""
+from datetime import date, timedelta
+
+from django.utils import timezone
+
+# Months scanned when looking for the next monthly/quarterly occurrence;
+# enough to get past short months and reach every quarter.
+_MONTH_SCAN = 24
+
+
+def quarter_of(month: int) -> int:
+    return (month - 1) // 3 + 1
+
+
+class Recurrence:
+    """
+    ``weekdays`` is a 7-bit mask (Monday=0 .. Sunday=6) for weekly items,
+    ``day`` the day of month for monthly/quarterly ones and ``quarter`` the
+    quarter a quarterly item is due in.
+    """
+
+    __slots__ = ("frequency", "weekdays", "day", "quarter")
+
+    # the SWOTItem fields ``compile`` reads; load at least these (``only()``)
+    # or each compile costs a query per deferred field
+    FIELDS = ("frequency", "dow_mask", "month_day", "created_at")
+
+    def __init__(self, frequency, weekdays=0, day=None, quarter=None):
+        self.frequency = frequency
+        self.weekdays = weekdays
+        self.day = day
+        self.quarter = quarter
+
+    @classmethod
+    def compile(cls, swot):
+        if swot.frequency == "daily":
+            return cls("daily")
+
+        created = (swot.created_at or timezone.now()).date()
+        if swot.frequency == "weekly":
+            return cls("weekly", weekdays=swot.dow_mask or 1 << created.weekday())
+        if swot.frequency == "monthly":
+            return cls("monthly", day=swot.month_day or created.day)
+        if swot.frequency == "quarterly":
+            return cls("quarterly", day=swot.month_day or created.day, quarter=quarter_of(created.month))
+        return cls(swot.frequency)  # unknown frequency: never due
+
+    def matches(self, target_date) -> bool:
+        if self.frequency == "daily":
+            return True
+        if self.frequency == "weekly":
+            return (self.weekdays >> target_date.weekday()) & 1 == 1
+        if self.frequency == "monthly":
+            return target_date.day == self.day
+        if self.frequency == "quarterly":
+            return target_date.day == self.day and quarter_of(target_date.month) == self.quarter
+        return False
+
+    def next_on_or_after(self, start):
+        """First date >= ``start`` this schedule is due on, or None if never."""
+        if self.frequency == "daily":
+            return start
+        if self.frequency == "weekly":
+            for offset in range(7):
+                candidate = start + timedelta(days=offset)
+                if self.matches(candidate):
+                    return candidate
+            return None
+        if self.frequency in ("monthly", "quarterly"):
+            year, month = start.year, start.month
+            for _ in range(_MONTH_SCAN):
+                try:
+                    candidate = date(year, month, self.day)
+                except ValueError:  # e.g. the 31st in a 30-day month
+                    candidate = None
+                if candidate and candidate >= start and self.matches(candidate):
+                    return candidate
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return None
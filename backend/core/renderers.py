@@ -0,0 +1,27 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class _TextExportRenderer(BaseRenderer):
+    """
+    Lets ``?format=csv|ndjson`` pass DRF content negotiation for streaming
+    export views. Those views return a StreamingHttpResponse themselves, so
+    only error payloads (dicts) ever reach ``render``.
+    """
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data).encode(self.charset)
+
+
+class CSVRenderer(_TextExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONRenderer(_TextExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
@@ -1,14 +1,33 @@
+import math
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from .models import User
 
+
+def validate_timezone(value):
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise serializers.ValidationError(f"Unknown timezone {value!r}; use an IANA name like Europe/Paris.")
+    return value
+
+
 class SignupSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
+    timezone = serializers.CharField(required=False, validators=[validate_timezone])
     class Meta:
         model = User
-        fields = ("id","email","password")
+        fields = ("id","email","password","timezone")
     def create(self, validated_data):
-        return User.objects.create_user(email=validated_data["email"], password=validated_data["password"])
+        return User.objects.create_user(**validated_data)
+
+class ProfileSerializer(serializers.ModelSerializer):
+    """PATCH /api/auth/me/: the fields a user may change."""
+    timezone = serializers.CharField(validators=[validate_timezone])
+    class Meta:
+        model = User
+        fields = ("timezone",)
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -22,14 +41,31 @@ class LoginSerializer(serializers.Serializer):
 
 
 from rest_framework import serializers
-from django.utils import timezone
+from .metrics import serializer_timer
 from .models import SWOTItem, Task, Streak
 
-class SWOTItemSerializer(serializers.ModelSerializer):
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class TimedSerializerMixin:
+    """Count ``.data`` rendering towards the request's serializer time (API metrics)."""
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class SWOTItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = SWOTItem
         fields = ["id", "type", "description", "frequency", "active", "created_at"]
         read_only_fields = ["id", "created_at"]
+        list_serializer_class = TimedListSerializer
 
     def create(self, validated_data):
         return SWOTItem.objects.create(owner=self.context["request"].user, **validated_data)
@@ -41,27 +77,106 @@ class SWOTItemSerializer(serializers.ModelSerializer):
         return data
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ["id", "swot_item", "date", "label", "status", "value", "created_at", "completed_at"]
         read_only_fields = ["id", "created_at", "completed_at"]
+        list_serializer_class = TimedListSerializer
+
+    def validate_value(self, value):
+        # FloatField accepts "nan"/"inf", which would poison DailyStats.value_sum
+        if value is not None and not math.isfinite(value):
+            raise serializers.ValidationError("A valid number is required.")
+        return value
 
     def validate(self, attrs):
         # Enforce immutability for past dates on create/update
         request = self.context["request"]
+        today = request.user.local_today()
         if request.method in ("PUT", "PATCH"):
             instance: Task = self.instance
-            if instance and instance.date < timezone.localdate():
+            if instance and instance.date < today:
                 raise serializers.ValidationError("Past tasks are immutable.")
         if request.method == "POST":
             # If you allow manual creation, block creating tasks in the past:
-            if "date" in attrs and attrs["date"] < timezone.localdate():
+            if "date" in attrs and attrs["date"] < today:
                 raise serializers.ValidationError("Cannot create tasks in the past.")
         return attrs
 
 
-class StreakSerializer(serializers.ModelSerializer):
+class StreakSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Streak
         fields = ["count", "last_day"]
+
+
+# -------------------
+# Lean read path
+# -------------------
+
+def _identity(value):
+    return value
+
+
+class ValuesRepresentation:
+    """
+    Serializer-shaped dicts built straight from ``.values()`` rows.
+
+    Field names, order and formats are taken once from ``serializer_class``,
+    then each row is converted without model instances or per-field DRF
+    dispatch. Use it for list reads only; writes go through the serializer.
+    """
+    # Fields whose to_representation leaves these DB values unchanged
+    PASSTHROUGH = (
+        serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+        serializers.BooleanField, serializers.PrimaryKeyRelatedField,
+    )
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._mapping = None
+
+    @property
+    def mapping(self):
+        # built lazily: serializer fields need the app registry
+        if self._mapping is None:
+            self._mapping = [
+                (name, field.source, self._converter(field))
+                for name, field in self.serializer_class().fields.items()
+                if not field.write_only
+            ]
+        return self._mapping
+
+    def _converter(self, field):
+        if isinstance(field, self.PASSTHROUGH):
+            return _identity
+        if isinstance(field, serializers.FloatField):
+            return float
+        if isinstance(field, serializers.DateField):
+            return lambda value: value.isoformat()
+        return field.to_representation  # e.g. DateTimeField: timezone + format settings
+
+    def _columns(self):
+        return [source for _, source, _ in self.mapping]
+
+    def _convert(self, rows):
+        mapping = self.mapping
+        with serializer_timer():
+            return [
+                {
+                    name: None if value is None else convert(value)
+                    for (name, _, convert), value in zip(mapping, row)
+                }
+                for row in rows
+            ]
+
+    def render(self, queryset):
+        return self._convert(list(queryset.values_list(*self._columns())))
+
+    async def arender(self, queryset):
+        return self._convert([row async for row in queryset.values_list(*self._columns())])
+
+
+swot_item_rows = ValuesRepresentation(SWOTItemSerializer)
+task_rows = ValuesRepresentation(TaskSerializer)
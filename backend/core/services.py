@@ -1,67 +1,169 @@
-from datetime import timedelta
-from django.utils import timezone
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.conf import settings
 from django.db import transaction
-from .models import SWOTItem, Task, Streak
+from django.db.models import Case, Count, F, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django_q.tasks import async_task, fetch_group
+from .caching import bump_revisions, invalidate_task_lists, is_day_materialized, mark_day_materialized
+from .models import DailyStats, SWOTItem, Task, Streak, User
+from .recurrence import quarter_of
 
+logger = logging.getLogger(__name__)
+
+# Rows per bulk insert (and per transaction) during task generation.
+GENERATION_BATCH_SIZE = 1000
+# Rolling generation looks this much past its interval, so a late run
+# can't miss a midnight (generation is idempotent).
+GENERATION_WINDOW_SLACK = timedelta(minutes=15)
 
 # -------------------
 # Streak handling
 # -------------------
 
 def update_streak_for_user(user):
-    """Update streak when the user completes a task today."""
-    today = timezone.localdate()
-    streak, _ = Streak.objects.get_or_create(owner=user)
-
-    if streak.last_day == today:
-        # Already counted today
-        return streak
+    """
+    Update streak when the user completes a task today (their local day).
 
-    if streak.last_day == today - timedelta(days=1):
-        streak.count += 1
-    else:
-        # Reset or start new streak
-        streak.count = 1
+    A single conditional UPDATE extends the streak (last counted yesterday)
+    or restarts it, and matches nothing once today is already counted, so
+    concurrent completions can't double-count. First-time users get their
+    row inserted. Returns True when the streak changed.
+    """
+    today = user.local_today()
+    changed = (
+        Streak.objects.filter(owner=user)
+        .exclude(last_day=today)
+        .update(
+            count=Case(
+                When(last_day=today - timedelta(days=1), then=F("count") + 1),
+                default=Value(1),
+            ),
+            last_day=today,
+            updated_at=timezone.now(),
+        )
+    )
+    if not changed:
+        # No row yet, or today is already counted
+        _, changed = Streak.objects.get_or_create(owner=user, defaults={"count": 1, "last_day": today})
 
-    streak.last_day = today
-    streak.save()
-    return streak
+    if changed:
+        bump_revisions([user.id], "streak")
+    return bool(changed)
 
 
 # -------------------
-# Task generation rules
+# Daily stats rollup
 # -------------------
 
-def _quarter_of(month: int) -> int:
-    return (month - 1) // 3 + 1
+def _daily_totals(tasks):
+    """Group a Task queryset into DailyStats-shaped rows."""
+    return (
+        tasks.order_by()
+        .values("owner_id", "date")
+        .annotate(
+            total=Count("id"),
+            done=Count("id", filter=Q(status="done")),
+            value_sum=Coalesce(Sum("value", filter=Q(status="done")), 0.0),
+        )
+    )
 
 
-def should_create_for(swot: SWOTItem, target_date: timezone.datetime.date) -> bool:
-    """Check if a SWOT item should generate a task on the given date."""
-    freq = swot.frequency
-    created = swot.created_at.date()
-
-    if freq == "daily":
-        return True
-
-    if freq == "weekly":
-        weekday = target_date.weekday()  # 0=Mon, 6=Sun
-        if swot.dow_mask:  # user picked weekdays
-            return (swot.dow_mask >> weekday) & 1 == 1
-        return weekday == created.weekday()  # fallback
-
-    if freq == "monthly":
-        day = swot.month_day or created.day
-        return target_date.day == day
-
-    if freq == "quarterly":
-        day = swot.month_day or created.day
-        return (
-            target_date.day == day
-            and _quarter_of(target_date.month) == _quarter_of(created.month)
+def refresh_daily_stats(pairs):
+    """
+    Recompute the DailyStats rows for ``(owner_id, date)`` pairs from their
+    tasks. Only the touched days are read, so this stays proportional to
+    the write that triggered it.
+
+    The rows are locked before the tasks are counted: a ``record_completions``
+    increment either committed first (and is counted) or waits and applies
+    on top of the recomputed value, so none is lost.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    owner_ids, days = {o for o, _ in pairs}, {d for _, d in pairs}
+    with transaction.atomic():
+        # rows must exist to be locked
+        DailyStats.objects.bulk_create(
+            [DailyStats(owner_id=owner_id, date=day) for owner_id, day in sorted(pairs)],
+            ignore_conflicts=True,
+            batch_size=GENERATION_BATCH_SIZE,
         )
+        stats = [
+            row
+            for row in DailyStats.objects.filter(owner_id__in=owner_ids, date__in=days)
+            .order_by("owner_id", "date")  # one lock order for every writer
+            .select_for_update()
+            .only("id", "owner_id", "date")
+            if (row.owner_id, row.date) in pairs
+        ]
+        totals = {
+            (row["owner_id"], row["date"]): row
+            for row in _daily_totals(Task.objects.filter(owner_id__in=owner_ids, date__in=days))
+        }
+        for row in stats:
+            counts = totals.get((row.owner_id, row.date), {})
+            row.total = counts.get("total", 0)
+            row.done = counts.get("done", 0)
+            row.value_sum = counts.get("value_sum", 0.0)
+        DailyStats.objects.bulk_update(stats, ["total", "done", "value_sum"], batch_size=GENERATION_BATCH_SIZE)
 
-    return False
+
+def record_completions(owner_id, completions):
+    """
+    Count tasks just marked done into DailyStats: one UPDATE per day.
+    ``completions`` is an iterable of ``(date, value)``; days without a
+    rollup row yet are recomputed instead.
+    """
+    per_day = defaultdict(lambda: [0, 0.0])
+    for day, value in completions:
+        per_day[day][0] += 1
+        per_day[day][1] += value or 0.0
+    missing = [
+        (owner_id, day)
+        for day, (count, value_sum) in sorted(per_day.items())  # same lock order as refresh_daily_stats
+        if not DailyStats.objects.filter(owner_id=owner_id, date=day).update(
+            done=F("done") + count, value_sum=F("value_sum") + value_sum
+        )
+    ]
+    refresh_daily_stats(missing)
+
+
+def rebuild_daily_stats(owner_ids=None, start=None, end=None):
+    """
+    Drop and recompute DailyStats from Task, optionally limited to some
+    users and/or a date range. Returns the number of rows written.
+    """
+    tasks, stats = Task.objects.all(), DailyStats.objects.all()
+    if owner_ids is not None:
+        tasks, stats = tasks.filter(owner_id__in=owner_ids), stats.filter(owner_id__in=owner_ids)
+    if start is not None:
+        tasks, stats = tasks.filter(date__gte=start), stats.filter(date__gte=start)
+    if end is not None:
+        tasks, stats = tasks.filter(date__lte=end), stats.filter(date__lte=end)
+
+    written = 0
+    with transaction.atomic():
+        stats.delete()
+        rows = _daily_totals(tasks).iterator(chunk_size=GENERATION_BATCH_SIZE)
+        for chunk in _chunked(rows, GENERATION_BATCH_SIZE):
+            DailyStats.objects.bulk_create([DailyStats(**row) for row in chunk])
+            written += len(chunk)
+    return written
+
+
+# -------------------
+# Task generation rules
+# -------------------
+
+def should_create_for(swot: SWOTItem, target_date: timezone.datetime.date) -> bool:
+    """Check if a SWOT item should generate a task on the given date."""
+    return swot.recurrence.matches(target_date)
 
 
 # -------------------
@@ -73,33 +175,133 @@ def generate_label(swot: SWOTItem) -> str:
     return swot.description if swot.type != "threat" else f"avoid: {swot.description}"
 
 
-@transaction.atomic
-def generate_tasks_for_date(target_date):
+def _chunked(iterable, size):
+    """Yield lists of at most ``size`` items from ``iterable``."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert_task_batch(pairs):
+    """
+    Insert tasks for one chunk of due ``(swot, date)`` pairs in a short
+    transaction. Returns (created, skipped).
+
+    Pairs that already have a task are skipped up front, matching the old
+    ``get_or_create(owner, swot_item, date)`` lookup even if the description
+    (and so the label) changed since. ``ignore_conflicts`` keeps other
+    writers safe against the unique constraint.
+
+    Ignored rows get no primary key, so "created" is the row count after
+    the insert minus the count before it. The chunk's SWOT items are locked
+    first, which serializes generation runs over the same items, so another
+    run's tasks can't show up between the two counts.
+    """
+    with transaction.atomic():
+        list(
+            SWOTItem.objects.filter(pk__in={sw.pk for sw, _ in pairs})
+            .order_by("pk")
+            .select_for_update()
+            .values_list("pk", flat=True)
+        )
+        candidates = Task.objects.filter(
+            swot_item_id__in={sw.pk for sw, _ in pairs},
+            date__in={day for _, day in pairs},
+        ).order_by()
+        rows = list(candidates.values_list("swot_item_id", "date"))
+        existing = set(rows)
+        new_tasks = [
+            Task(
+                owner_id=sw.owner_id,
+                swot_item_id=sw.pk,
+                date=day,
+                label=generate_label(sw),
+                status="pending",
+            )
+            for sw, day in pairs
+            if (sw.pk, day) not in existing
+        ]
+        Task.objects.bulk_create(new_tasks, ignore_conflicts=True)
+        created = candidates.count() - len(rows) if new_tasks else 0
+        refresh_daily_stats((t.owner_id, t.date) for t in new_tasks)
+    invalidate_task_lists((t.owner_id, t.date) for t in new_tasks)
+    return created, len(pairs) - created
+
+
+def generate_tasks_for_date(target_date, batch_size=GENERATION_BATCH_SIZE):
     """
     Generate tasks for ALL active SWOT items for a specific date.
     Safe to call repeatedly (idempotent).
+
+    Only items due on the date are loaded (``SWOTItem.objects.due_on``) and
+    their tasks are written with chunked ``bulk_create`` calls, one short
+    transaction per chunk.
+    Returns ``{"created": n, "skipped": m}``.
     """
-    created_count = 0
-    swots = SWOTItem.objects.select_related("owner").filter(active=True)
+    created_count = skipped_count = 0
+    swots = (
+        SWOTItem.objects.due_on(target_date)
+        .only("id", "owner_id", "type", "description")
+        .iterator(chunk_size=batch_size)
+    )
+    for chunk in _chunked(((sw, target_date) for sw in swots), batch_size):
+        created, skipped = _insert_task_batch(chunk)
+        created_count += created
+        skipped_count += skipped
 
+    return {"created": created_count, "skipped": skipped_count}
+
+
+def _advance_next_due(swots, after):
+    """Move ``next_due`` of generated items to their first due date after ``after``."""
+    by_next_due = defaultdict(list)
     for sw in swots:
-        try:
-            if not should_create_for(sw, target_date):
-                continue
-
-            _, created = Task.objects.get_or_create(
-                owner=sw.owner,
-                swot_item=sw,
-                date=target_date,
-                defaults={"label": generate_label(sw), "status": "pending"},
-            )
-            if created:
-                created_count += 1
-        except Exception:
-            # One broken item shouldn’t stop the batch
-            continue
+        by_next_due[sw.recurrence.next_on_or_after(after + timedelta(days=1))].append(sw.pk)
+    # one UPDATE per distinct date; daily items all share one
+    for next_due, pks in by_next_due.items():
+        SWOTItem.objects.filter(pk__in=pks).update(next_due=next_due)
+
+
+def generate_scheduled_tasks(target_date, start_pk=None, end_pk=None, batch_size=GENERATION_BATCH_SIZE,
+                             timezones=None):
+    """
+    Nightly generation driven by the ``next_due`` index.
+
+    Reads only items with ``next_due <= target_date`` (an index range scan),
+    confirms each against its compiled recurrence (``next_due`` can lag after
+    a missed night), inserts the due tasks and advances ``next_due`` past
+    ``target_date``. Optionally limited to ``start_pk <= pk < end_pk`` and/or
+    to owners in ``timezones``. Returns ``{"created": n, "skipped": m}``.
+    """
+    base = SWOTItem.objects.filter(active=True, next_due__lte=target_date)
+    if start_pk is not None:
+        base = base.filter(pk__gte=start_pk, pk__lt=end_pk)
+    if timezones is None:
+        owner_batches = [None]
+    else:
+        # Owners first (User.timezone index), then their items by owner_id:
+        # a bucket's run never scans other timezones' due items.
+        owner_ids = list(User.objects.filter(timezone__in=timezones).order_by("pk").values_list("pk", flat=True))
+        owner_batches = _chunked(owner_ids, batch_size)
 
-    return created_count
+    created_count = skipped_count = 0
+    for owners in owner_batches:
+        swots = base if owners is None else base.filter(owner_id__in=owners)
+        swots = swots.for_generation().iterator(chunk_size=batch_size)
+        for chunk in _chunked(swots, batch_size):
+            due = [(sw, target_date) for sw in chunk if sw.recurrence.matches(target_date)]
+            if due:
+                created, skipped = _insert_task_batch(due)
+                created_count += created
+                skipped_count += skipped
+            _advance_next_due(chunk, target_date)
+
+    return {"created": created_count, "skipped": skipped_count}
 
 
 def generate_tasks_for_swot_item(swot_item, date):
@@ -114,11 +316,245 @@ def generate_tasks_for_swot_item(swot_item, date):
             date=date,
             defaults={"label": generate_label(swot_item), "status": "pending"},
         )
+        if created:
+            refresh_daily_stats([(task.owner_id, date)])
         return 1 if created else 0
     return 0
 
 
+def _occurrences(swot, dates, by_weekday, by_day, by_quarter_day):
+    """Dates in a precomputed range on which ``swot`` is due (see ``should_create_for``)."""
+    rule = swot.recurrence
+    if rule.frequency == "daily":
+        return dates
+    if rule.frequency == "weekly":
+        return sorted(d for wd in range(7) if (rule.weekdays >> wd) & 1 for d in by_weekday.get(wd, ()))
+    if rule.frequency == "monthly":
+        return by_day.get(rule.day, [])
+    if rule.frequency == "quarterly":
+        return by_quarter_day.get((rule.quarter, rule.day), [])
+    return []
+
+
+def generate_tasks_for_range(start, end, batch_size=GENERATION_BATCH_SIZE, progress=None):
+    """
+    Generate tasks for every date in ``start..end`` (inclusive) in one pass.
+
+    Due items are loaded once per recurrence class for the whole range and
+    expanded to their dates in memory, then written with the same batched,
+    idempotent inserts as ``generate_tasks_for_date``. ``progress`` is called
+    after every batch as ``progress(frequency, created, skipped)``.
+    Returns ``{"created": n, "skipped": m}`` totals.
+    """
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    by_weekday, by_day, by_quarter_day = {}, {}, {}
+    for d in dates:
+        by_weekday.setdefault(d.weekday(), []).append(d)
+        by_day.setdefault(d.day, []).append(d)
+        by_quarter_day.setdefault((quarter_of(d.month), d.day), []).append(d)
+
+    totals = {"created": 0, "skipped": 0}
+    for freq, _ in SWOTItem.FREQ_CHOICES:
+        swots = (
+            SWOTItem.objects.due_between(start, end)
+            .filter(frequency=freq)
+            .for_generation()
+            .iterator(chunk_size=batch_size)
+        )
+        pairs = (
+            (sw, d)
+            for sw in swots
+            for d in _occurrences(sw, dates, by_weekday, by_day, by_quarter_day)
+        )
+        for chunk in _chunked(pairs, batch_size):
+            created, skipped = _insert_task_batch(chunk)
+            totals["created"] += created
+            totals["skipped"] += skipped
+            if progress:
+                progress(freq, created, skipped)
+
+    return totals
+
+
 def generate_tasks_for_tomorrow():
     """Helper for nightly scheduler: generate tomorrow’s tasks for all SWOTs."""
     target = timezone.localdate() + timedelta(days=1)
-    return generate_tasks_for_date(target)
+    if settings.TASK_GENERATION_MODE == "lazy":
+        logger.info("TASK_GENERATION_MODE=lazy: skipping nightly generation for %s", target)
+        return {"created": 0, "skipped": 0}
+    return generate_scheduled_tasks(target)
+
+
+# -------------------
+# Rolling generation (per-user timezones)
+# -------------------
+
+def timezones_nearing_midnight(now=None, window=timedelta(hours=1)):
+    """
+    ``{timezone: local tomorrow}`` for every timezone in use whose next local
+    midnight falls within ``window`` after ``now``.
+    """
+    now = now or timezone.now()
+    due = {}
+    for name in User.objects.order_by().values_list("timezone", flat=True).distinct():
+        try:
+            tz = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            logger.warning("Skipping unknown timezone %r", name)
+            continue
+        local_tomorrow = now.astimezone(tz).date() + timedelta(days=1)
+        midnight = datetime.combine(local_tomorrow, time.min, tzinfo=tz).astimezone(dt_timezone.utc)
+        if midnight - now <= window:
+            due[name] = local_tomorrow
+    return due
+
+
+def generate_tasks_for_timezones(interval_minutes=60, now=None):
+    """
+    Scheduler entry point for rolling generation: run every
+    ``interval_minutes``, it writes tomorrow's tasks only for users whose
+    local midnight is coming up, so load spreads across the day instead of
+    one nightly spike. Returns totals plus the timezones handled.
+    """
+    result = {"created": 0, "skipped": 0, "timezones": []}
+    if settings.TASK_GENERATION_MODE == "lazy":
+        logger.info("TASK_GENERATION_MODE=lazy: skipping rolling generation")
+        return result
+
+    due = timezones_nearing_midnight(now, timedelta(minutes=interval_minutes) + GENERATION_WINDOW_SLACK)
+    by_date = defaultdict(list)
+    for name, target in due.items():
+        by_date[target].append(name)
+    for target, names in sorted(by_date.items()):
+        counts = generate_scheduled_tasks(target, timezones=names)
+        result["created"] += counts["created"]
+        result["skipped"] += counts["skipped"]
+        result["timezones"] += sorted(names)
+    logger.info(
+        "Rolling generation: %d created, %d skipped for %s",
+        result["created"], result["skipped"], ", ".join(result["timezones"]) or "no timezones",
+    )
+    return result
+
+
+# -------------------
+# Lazy (on-read) generation
+# -------------------
+
+def lazy_generation_enabled():
+    return settings.TASK_GENERATION_MODE in ("lazy", "hybrid")
+
+
+def materialize_day(user, day):
+    """
+    Make sure every task due on ``day`` for ``user`` exists, on read.
+
+    The first read of a day checks the user's active SWOT items and inserts
+    the missing tasks in one batch; after that a cache marker (then the
+    DailyStats.materialized flag) short-circuits. Past days (in the user's
+    timezone) and days beyond TASK_GENERATION_LAZY_MAX_DAYS_AHEAD are left
+    alone. Returns the number of tasks created.
+    """
+    owner_id = user.pk
+    today = user.local_today()
+    if not lazy_generation_enabled() or not (
+        today <= day <= today + timedelta(days=settings.TASK_GENERATION_LAZY_MAX_DAYS_AHEAD)
+    ):
+        return 0
+    if is_day_materialized(owner_id, day):
+        return 0
+
+    created = 0
+    if not DailyStats.objects.filter(owner_id=owner_id, date=day, materialized=True).exists():
+        due = [
+            (swot, day)
+            for swot in SWOTItem.objects.filter(owner_id=owner_id, active=True).for_generation()
+            if swot.recurrence.matches(day)
+        ]
+        with transaction.atomic():
+            if due:
+                created, _ = _insert_task_batch(due)
+            # also makes sure the row exists before flagging it
+            refresh_daily_stats([(owner_id, day)])
+            DailyStats.objects.filter(owner_id=owner_id, date=day).update(materialized=True)
+    mark_day_materialized(owner_id, day)
+    return created
+
+
+def reset_materialized_days(user):
+    """A SWOT item changed: today's and future days must be re-checked on read."""
+    if lazy_generation_enabled():
+        DailyStats.objects.filter(
+            owner_id=user.pk, date__gte=user.local_today(), materialized=True
+        ).update(materialized=False)
+
+
+# -------------------
+# Sharded generation (django-q fan-out)
+# -------------------
+
+def plan_generation_shards(shard_count):
+    """
+    Split active SWOT items into at most ``shard_count`` primary-key ranges.
+    Returns a list of ``(start_pk, end_pk)`` pairs, end exclusive.
+    """
+    bounds = SWOTItem.objects.filter(active=True).aggregate(lo=Min("pk"), hi=Max("pk"))
+    if bounds["lo"] is None:
+        return []
+    lo, hi = bounds["lo"], bounds["hi"] + 1
+    step = max(1, -(-(hi - lo) // shard_count))  # ceil division
+    return [(start, min(start + step, hi)) for start in range(lo, hi, step)]
+
+
+def generate_tasks_for_shard(target_date, start_pk, end_pk, batch_size=GENERATION_BATCH_SIZE):
+    """Generate tasks for the due SWOT items with ``start_pk <= pk < end_pk``."""
+    return generate_scheduled_tasks(target_date, start_pk, end_pk, batch_size)
+
+
+def generate_tasks_for_tomorrow_sharded(shard_count=None):
+    """
+    Fan tomorrow's generation out as one django-q task per pk shard.
+    Shards commit independently, so one failing shard doesn't undo the rest;
+    ``collect_generation_shard`` logs the totals once every shard reported.
+    Defaults to one shard per Q_CLUSTER worker. Returns the django-q group id
+    (None when TASK_GENERATION_MODE is lazy).
+    """
+    target = timezone.localdate() + timedelta(days=1)
+    if settings.TASK_GENERATION_MODE == "lazy":
+        logger.info("TASK_GENERATION_MODE=lazy: skipping nightly generation for %s", target)
+        return None
+    shard_count = shard_count or settings.Q_CLUSTER.get("workers", 1)
+    shards = plan_generation_shards(shard_count)
+    # The group id carries the shard count so the hook knows when the run is complete.
+    group = f"generate_tasks:{target.isoformat()}:{len(shards)}:{uuid.uuid4().hex[:8]}"
+
+    for start_pk, end_pk in shards:
+        async_task(
+            "core.services.generate_tasks_for_shard",
+            target,
+            start_pk,
+            end_pk,
+            group=group,
+            hook="core.services.collect_generation_shard",
+        )
+    return group
+
+
+def collect_generation_shard(task):
+    """django-q hook for shard tasks: aggregate per-shard counts once all have finished."""
+    _, target, expected, _ = task.group.split(":")
+    shards = fetch_group(task.group, failures=True) or []
+    if len(shards) < int(expected):
+        return None
+
+    totals = {"created": 0, "skipped": 0, "failed_shards": []}
+    for shard in shards:
+        if shard.success:
+            totals["created"] += shard.result["created"]
+            totals["skipped"] += shard.result["skipped"]
+        else:
+            totals["failed_shards"].append(list(shard.args[1:3]))
+
+    log = logger.error if totals["failed_shards"] else logger.info
+    log("Task generation for %s: %s", target, totals)
+    return totals
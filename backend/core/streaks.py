@@ -0,0 +1,179 @@
+"""
+Streak recomputation from task history.
+
+``Streak`` is a denormalised counter kept by ``update_streak_for_user``.
+This module derives the same value from completed tasks with one
+gaps-and-islands window query per batch of users, and fixes any rows that
+have drifted.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import connection
+from django.db.models import Case, DateField, IntegerField, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .caching import bump_revisions
+from .models import Streak, Task, User
+
+logger = logging.getLogger(__name__)
+
+# Users per window query / fix-up UPDATE.
+STREAK_BATCH_SIZE = 1000
+
+_EPOCH = date(1970, 1, 1)
+# "day" (a DATE) as an integer day number since 1970-01-01, per vendor;
+# other backends derive streaks in Python instead
+_DAY_NUMBER = {
+    "postgresql": "(day - DATE '1970-01-01')",
+    "sqlite": "CAST(julianday(day) - 2440587.5 AS INTEGER)",
+}
+
+# Consecutive completion days share ``day_no - row_number``; the latest
+# such island per user is the current streak.
+_STREAK_SQL = """
+WITH days (owner_id, day) AS ({days}),
+islands AS (
+    SELECT owner_id, {day_number} AS day_no,
+           {day_number} - ROW_NUMBER() OVER (PARTITION BY owner_id ORDER BY day) AS island
+    FROM days
+),
+runs AS (
+    SELECT owner_id, MAX(day_no) AS last_day_no, COUNT(*) AS length,
+           ROW_NUMBER() OVER (PARTITION BY owner_id ORDER BY MAX(day_no) DESC) AS recency
+    FROM islands
+    GROUP BY owner_id, island
+)
+SELECT owner_id, length, last_day_no FROM runs WHERE recency = 1
+"""
+
+
+def derive_streaks(owner_ids):
+    """
+    Streaks implied by completed tasks: ``{owner_id: (count, last_day)}``.
+    A day counts when at least one task was completed on it (date of
+    ``completed_at`` in the owner's timezone, as in ``update_streak_for_user``);
+    users with no completions are omitted.
+    """
+    by_zone = defaultdict(list)
+    for user in User.objects.filter(pk__in=owner_ids).only("pk", "timezone"):
+        by_zone[user.zoneinfo].append(user.pk)
+    if not by_zone:
+        return {}
+    # one SELECT per timezone in the batch, UNIONed into the CTE
+    days = [
+        Task.objects.filter(owner_id__in=ids, status="done", completed_at__isnull=False)
+        .annotate(day=TruncDate("completed_at", tzinfo=zone))
+        .order_by()
+        .values("owner_id", "day")
+        .distinct()
+        for zone, ids in by_zone.items()
+    ]
+    days = days[0].union(*days[1:]) if len(days) > 1 else days[0]
+    day_number = _DAY_NUMBER.get(connection.vendor)
+    if day_number is None:
+        return _streaks_from_days(days)
+    days_sql, params = days.query.sql_with_params()
+    sql = _STREAK_SQL.format(days=days_sql, day_number=day_number)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {
+            owner_id: (length, _EPOCH + timedelta(days=last_day_no))
+            for owner_id, length, last_day_no in cursor.fetchall()
+        }
+
+
+def _streaks_from_days(days):
+    """``derive_streaks`` in Python, from ``{"owner_id", "day"}`` rows."""
+    by_owner = defaultdict(set)
+    for row in days:
+        by_owner[row["owner_id"]].add(row["day"])
+    streaks = {}
+    for owner_id, owner_days in by_owner.items():
+        last_day, length = max(owner_days), 1
+        while last_day - timedelta(days=length) in owner_days:
+            length += 1
+        streaks[owner_id] = (length, last_day)
+    return streaks
+
+
+def _fix_streaks(fixes, checked_at):
+    """
+    Write ``{owner_id: (count, last_day)}`` with one UPDATE plus one insert.
+    Rows touched since ``checked_at`` are left alone: a live completion has
+    already moved them on.
+    """
+    now = timezone.now()
+    updated = set(
+        Streak.objects.filter(owner_id__in=fixes, updated_at__lt=checked_at).values_list("owner_id", flat=True)
+    )
+    if updated:
+        Streak.objects.filter(owner_id__in=updated, updated_at__lt=checked_at).update(
+            count=Case(*[When(owner_id=o, then=Value(fixes[o][0])) for o in updated], output_field=IntegerField()),
+            last_day=Case(*[When(owner_id=o, then=Value(fixes[o][1])) for o in updated], output_field=DateField()),
+            updated_at=now,
+        )
+    existing = set(Streak.objects.filter(owner_id__in=fixes).values_list("owner_id", flat=True))
+    Streak.objects.bulk_create(
+        [Streak(owner_id=o, count=c, last_day=d) for o, (c, d) in fixes.items() if o not in existing],
+        ignore_conflicts=True,
+    )
+    changed = updated | (set(fixes) - existing)
+    bump_revisions(changed, "streak")
+    return len(changed)
+
+
+def recompute_streaks(owner_ids=None, batch_size=STREAK_BATCH_SIZE, dry_run=False):
+    """
+    Compare every user's (or just ``owner_ids``') Streak with the one derived
+    from history, in batches, and fix mismatches unless ``dry_run``.
+    Returns ``{"checked", "mismatched", "fixed", "sample"}``; ``sample``
+    lists a few ``(owner_id, stored, derived)`` mismatches.
+    """
+    users = User.objects.order_by("pk").values_list("pk", flat=True)
+    if owner_ids is not None:
+        users = users.filter(pk__in=owner_ids)
+
+    result = {"checked": 0, "mismatched": 0, "fixed": 0, "sample": []}
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]
+        checked_at = timezone.now()
+
+        derived = derive_streaks(batch)
+        stored = {
+            owner_id: (count, last_day)
+            for owner_id, count, last_day in Streak.objects.filter(owner_id__in=batch)
+            .values_list("owner_id", "count", "last_day")
+        }
+        mismatched = {}
+        for owner_id in batch:
+            expected = derived.get(owner_id, (0, None))
+            current = stored.get(owner_id, (0, None))
+            # A user who never completed anything needs no Streak row
+            if expected != current and not (owner_id not in stored and expected == (0, None)):
+                mismatched[owner_id] = expected
+                if len(result["sample"]) < 10:
+                    result["sample"].append((owner_id, current, expected))
+
+        result["checked"] += len(batch)
+        result["mismatched"] += len(mismatched)
+        if mismatched and not dry_run:
+            result["fixed"] += _fix_streaks(mismatched, checked_at)
+    return result
+
+
+def nightly_streak_check():
+    """django-q entry point: repair drifted streaks and log what changed."""
+    result = recompute_streaks()
+    log = logger.warning if result["mismatched"] else logger.info
+    log(
+        "Streak check: %d users, %d mismatched, %d fixed",
+        result["checked"], result["mismatched"], result["fixed"],
+    )
+    return result
@@ -1,3 +1,1217 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from .authentication import TOKEN_MAX_LIFETIME, TOKEN_TTL, issue_token, user_for_token
+from .caching import cache_stats, get_revision
+from .models import DailyStats, Streak, SWOTItem, Task, User
+from .pagination import SWOTItemKeysetPagination
+from .serializers import SWOTItemSerializer, TaskSerializer, swot_item_rows, task_rows
+from .services import (
+    _advance_next_due, generate_scheduled_tasks, generate_tasks_for_date, generate_tasks_for_timezones,
+    materialize_day, rebuild_daily_stats, should_create_for, timezones_nearing_midnight, update_streak_for_user,
+)
+from .streaks import _streaks_from_days, derive_streaks, recompute_streaks
+from .sync import InvalidCursor, decode_cursor, encode_cursor
+
+
+class ValuesRepresentationParityTests(TestCase):
+    """The lean list path must render byte-for-byte what the serializers do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="parity@example.com", password="x")
+        today = timezone.localdate()
+        for i, (kind, frequency) in enumerate([
+            ("strength", "daily"), ("weakness", "weekly"), ("opportunity", "monthly"), ("threat", "quarterly"),
+        ]):
+            item = SWOTItem.objects.create(
+                owner=cls.user, type=kind, description=f"Item “{i}” ✓", frequency=frequency, active=i != 2,
+            )
+            Task.objects.create(owner=cls.user, swot_item=item, date=today, label=f"{kind}: {i}")
+            Task.objects.create(
+                owner=cls.user, swot_item=item, date=today - timedelta(days=1), label=f"done {i}",
+                status="done", value=[None, 0, 2.5, 7][i], completed_at=timezone.now(),
+            )
+
+    def assertSameJSON(self, lean, serialized):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(lean), renderer.render(serialized))
+
+    def test_swot_items(self):
+        qs = SWOTItem.objects.filter(owner=self.user)
+        self.assertSameJSON(swot_item_rows.render(qs), SWOTItemSerializer(qs, many=True).data)
+
+    def test_tasks(self):
+        qs = Task.objects.filter(owner=self.user).order_by("date", "created_at")
+        self.assertSameJSON(task_rows.render(qs), TaskSerializer(qs, many=True).data)
+
+    def test_empty(self):
+        self.assertEqual(task_rows.render(Task.objects.none()), [])
+
+
+class DueOnParityTests(TestCase):
+    """``SWOTItem.objects.due_on`` must select exactly what ``should_create_for`` accepts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="due-on@example.com", password="x")
+        schedules = [
+            ("daily", 0b1111111, None, True),
+            ("daily", 0b1111111, None, False),
+            ("weekly", 0b0000001, None, True),   # Mondays
+            ("weekly", 0b1100000, None, True),   # weekends
+            ("weekly", 0, None, True),           # weekday of created_at
+            ("monthly", 0b1111111, 15, True),
+            ("monthly", 0b1111111, 31, True),
+            ("monthly", 0b1111111, None, True),  # day of created_at
+            ("monthly", 0b1111111, 0, True),
+            ("quarterly", 0b1111111, 1, True),
+            ("quarterly", 0b1111111, None, True),
+        ]
+        created = [
+            datetime(2024, 2, 29, 23, 30, tzinfo=dt_timezone.utc),
+            datetime(2024, 8, 7, 9, tzinfo=dt_timezone.utc),
+        ]
+        for i, (frequency, dow_mask, month_day, active) in enumerate(schedules):
+            for j, created_at in enumerate(created):
+                item = SWOTItem.objects.create(
+                    owner=cls.user, type="strength", description=f"{frequency} {i}.{j}",
+                    frequency=frequency, dow_mask=dow_mask, month_day=month_day, active=active,
+                )
+                SWOTItem.objects.filter(pk=item.pk).update(created_at=created_at)
+        cls.items = list(SWOTItem.objects.filter(owner=cls.user))
+
+    def test_every_day_of_a_leap_year(self):
+        day = date(2024, 1, 1)
+        while day.year == 2024:
+            expected = {item.pk for item in self.items if item.active and should_create_for(item, day)}
+            actual = set(SWOTItem.objects.filter(owner=self.user).due_on(day).values_list("pk", flat=True))
+            self.assertEqual(actual, expected, day)
+            day += timedelta(days=1)
+
+
+class StreakUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="streak@example.com", password="x", timezone="Pacific/Kiritimati")
+
+    def setUp(self):
+        cache.clear()
+        self.today = self.user.local_today()
+
+    def set_streak(self, count, last_day):
+        Streak.objects.update_or_create(owner=self.user, defaults={"count": count, "last_day": last_day})
+
+    def assertStreak(self, count, last_day):
+        streak = Streak.objects.get(owner=self.user)
+        self.assertEqual((streak.count, streak.last_day), (count, last_day))
+
+    def test_first_completion_creates_the_row(self):
+        revision = get_revision(self.user.id, "streak")
+        self.assertTrue(update_streak_for_user(self.user))
+        self.assertStreak(1, self.today)
+        self.assertNotEqual(get_revision(self.user.id, "streak"), revision)
+
+    def test_same_day_is_counted_once(self):
+        self.set_streak(4, self.today)
+        revision = get_revision(self.user.id, "streak")
+        self.assertFalse(update_streak_for_user(self.user))
+        self.assertFalse(update_streak_for_user(self.user))
+        self.assertStreak(4, self.today)
+        self.assertEqual(get_revision(self.user.id, "streak"), revision)
+
+    def test_extends_from_yesterday(self):
+        self.set_streak(4, self.today - timedelta(days=1))
+        self.assertTrue(update_streak_for_user(self.user))
+        self.assertStreak(5, self.today)
+
+    def test_gap_restarts(self):
+        for last_day in (self.today - timedelta(days=2), None):
+            self.set_streak(4, last_day)
+            self.assertTrue(update_streak_for_user(self.user))
+            self.assertStreak(1, self.today)
+
+    def test_uses_the_owners_local_day(self):
+        # Noon UTC on May 1st is already May 2nd at UTC+14
+        now = datetime(2024, 5, 1, 12, tzinfo=dt_timezone.utc)
+        self.set_streak(4, date(2024, 5, 1))
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            self.assertTrue(update_streak_for_user(self.user))
+        self.assertStreak(5, date(2024, 5, 2))
+
+
+class BulkDoneTests(APITestCase):
+    url = "/api/tasks/bulk_done/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="bulk@example.com", password="x")
+        cls.other = User.objects.create_user(email="bulk-other@example.com", password="x")
+        today = cls.user.local_today()
+        item = SWOTItem.objects.create(owner=cls.user, type="strength", description="d", frequency="daily")
+        cls.tasks = [
+            Task.objects.create(owner=cls.user, swot_item=item, date=today, label=f"t{i}") for i in range(3)
+        ]
+        cls.past = Task.objects.create(owner=cls.user, swot_item=item, date=today - timedelta(days=1), label="past")
+        other_item = SWOTItem.objects.create(owner=cls.other, type="threat", description="d", frequency="daily")
+        cls.foreign = Task.objects.create(owner=cls.other, swot_item=other_item, date=today, label="foreign")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def post(self, payload):
+        return self.client.post(self.url, payload, format="json")
+
+    def statuses(self, response):
+        return {result["id"]: result["status"] for result in response.data["results"]}
+
+    def test_marks_done_once(self):
+        first, second = self.tasks[:2]
+        payload = [{"id": first.pk, "value": 2.5}, {"id": second.pk}]
+        response = self.post(payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(response), {first.pk: "done", second.pk: "done"})
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.value), ("done", 2.5))
+        self.assertIsNotNone(first.completed_at)
+        completed_at = first.completed_at
+
+        # Retrying the same request changes nothing
+        response = self.post({"tasks": payload})
+        self.assertEqual(self.statuses(response), {first.pk: "already_done", second.pk: "already_done"})
+        first.refresh_from_db()
+        self.assertEqual(first.completed_at, completed_at)
+        stats = DailyStats.objects.get(owner=self.user, date=first.date)
+        self.assertEqual((stats.done, stats.value_sum), (2, 2.5))
+        self.assertEqual(Streak.objects.get(owner=self.user).count, 1)
+
+    def test_per_task_errors(self):
+        ok = self.tasks[0]
+        response = self.post([
+            {"id": ok.pk},
+            {"id": self.tasks[1].pk, "value": -1},
+            {"id": self.tasks[2].pk, "value": "nan"},
+            {"id": self.past.pk},
+            {"id": self.foreign.pk},
+            {"id": 10**9},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = {result["id"]: result for result in response.data["results"]}
+        self.assertEqual(results[ok.pk]["status"], "done")
+        self.assertEqual(results[self.tasks[1].pk]["detail"], "value must be >= 0")
+        self.assertEqual(results[self.tasks[2].pk]["detail"], "Invalid value")
+        self.assertEqual(results[self.past.pk]["detail"], "Past tasks are immutable.")
+        self.assertEqual(results[self.foreign.pk]["status"], "not_found")
+        self.assertEqual(results[10**9]["status"], "not_found")
+        self.assertEqual(
+            set(Task.objects.filter(status="done").values_list("pk", flat=True)), {ok.pk},
+        )
+
+    def test_rejects_malformed_requests(self):
+        for payload in ([], {"tasks": []}, {"id": self.tasks[0].pk}, [{"id": "x"}], [{"value": 1}],
+                        [{"id": self.tasks[0].pk}] * 201):
+            with self.subTest(payload=str(payload)[:40]):
+                self.assertEqual(self.post(payload).status_code, 400)
+        self.assertFalse(Task.objects.filter(status="done").exists())
+
+
+class SyncTests(APITestCase):
+    url = "/api/sync/"
+    start = datetime(2024, 5, 1, 12, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="sync@example.com", password="x")
+        self.client.force_authenticate(self.user)
+        with self.at(0):
+            self.item = SWOTItem.objects.create(owner=self.user, type="strength", description="d", frequency="daily")
+            self.tasks = [
+                Task.objects.create(owner=self.user, swot_item=self.item, date=self.start.date(), label=f"t{i}")
+                for i in range(3)
+            ]
+            self.kept = SWOTItem.objects.create(owner=self.user, type="weakness", description="k", frequency="daily")
+            self.kept_task = Task.objects.create(
+                owner=self.user, swot_item=self.kept, date=self.start.date(), label="kept",
+            )
+
+    def at(self, minutes):
+        return mock.patch("django.utils.timezone.now", return_value=self.start + timedelta(minutes=minutes))
+
+    def poll(self, since=None):
+        response = self.client.get(self.url, {"since": since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_cursor_round_trip(self):
+        positions = {"tasks": (self.start, 42), "tombstones": (self.start + timedelta(microseconds=1), 0)}
+        cursor = encode_cursor(positions)
+        self.assertRegex(cursor, r"^[A-Za-z0-9_-]+$")
+        self.assertEqual(decode_cursor(cursor), positions)
+        naive = base64.urlsafe_b64encode(b'{"tasks":["2020-01-01",0]}').decode()
+        for bad in ("!!", "bm90IGpzb24", encode_cursor({})[:-1] + "x", naive):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(bad)
+
+    def test_invalid_cursor_is_rejected(self):
+        naive = base64.urlsafe_b64encode(b'{"tasks":["2020-01-01",0]}').decode()
+        for cursor in ("garbage", naive):
+            self.assertEqual(self.client.get(self.url, {"since": cursor}).status_code, 400)
+
+    def test_changes_and_tombstones_round_trip(self):
+        with self.at(1):
+            snapshot = self.poll()
+        self.assertFalse(snapshot["has_more"])
+        self.assertEqual({t["id"] for t in snapshot["tasks"]}, {t.pk for t in self.tasks} | {self.kept_task.pk})
+        self.assertEqual({i["id"] for i in snapshot["swot"]}, {self.item.pk, self.kept.pk})
+        self.assertEqual(snapshot["deleted"], {"tasks": [], "swot": []})
+
+        with self.at(10):
+            self.assertEqual(self.client.delete(f"/api/swot/{self.item.pk}/").status_code, 204)
+            response = self.client.patch(f"/api/tasks/{self.kept_task.pk}/", {"label": "renamed"}, format="json")
+            self.assertEqual(response.status_code, 200)
+        with self.at(11):
+            changes = self.poll(snapshot["cursor"])
+        self.assertEqual([t["id"] for t in changes["tasks"]], [self.kept_task.pk])
+        self.assertEqual(changes["swot"], [])
+        self.assertEqual(changes["deleted"]["swot"], [self.item.pk])
+        self.assertEqual(sorted(changes["deleted"]["tasks"]), sorted(t.pk for t in self.tasks))
+
+        # Caught up: nothing is sent twice once past the safety window
+        with self.at(20):
+            caught_up = self.poll(changes["cursor"])
+        self.assertEqual((caught_up["tasks"], caught_up["swot"]), ([], []))
+        self.assertEqual(caught_up["deleted"], {"tasks": [], "swot": []})
+
+    def test_other_users_changes_are_not_sent(self):
+        other = User.objects.create_user(email="sync-other@example.com", password="x")
+        item = SWOTItem.objects.create(owner=other, type="threat", description="d", frequency="daily")
+        self.client.force_authenticate(other)
+        self.client.delete(f"/api/swot/{item.pk}/")
+        self.client.force_authenticate(self.user)
+        data = self.poll()
+        self.assertEqual(data["deleted"], {"tasks": [], "swot": []})
+        self.assertNotIn(item.pk, {i["id"] for i in data["swot"]})
+
+    def test_pages(self):
+        with mock.patch("core.sync.PAGE_SIZE", 3), self.at(1):
+            first = self.poll()
+            self.assertTrue(first["has_more"])
+            second = self.poll(first["cursor"])
+        self.assertFalse(second["has_more"])
+        ids = [t["id"] for t in first["tasks"] + second["tasks"]]
+        self.assertEqual(sorted(ids), sorted([t.pk for t in self.tasks] + [self.kept_task.pk]))
+
+
+class SignedTokenTests(APITestCase):
+    me_url = "/api/auth/me/"
+    now = 1_700_000_000
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="token@example.com", password="secret-pass")
+
+    def at(self, seconds):
+        return mock.patch("time.time", return_value=self.now + seconds)
+
+    def me(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.client.get(self.me_url)
+
+    def assertRejected(self, response, detail="Invalid or expired token."):
+        # 403 rather than 401: SessionAuthentication, listed first, sends no WWW-Authenticate
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data["detail"], detail)
+
+    def test_login_issues_a_working_token(self):
+        response = self.client.post(
+            "/api/auth/login/", {"email": "token@example.com", "password": "secret-pass"}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["expires_in"], TOKEN_TTL)
+        token = response.data["token"]
+        self.client.logout()  # drop the session, authenticate with the token alone
+
+        response = self.me(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], self.user.pk)
+        self.assertNotIn("token", response.data)  # fresh tokens aren't renewed
+
+    def test_expiry_and_renewal(self):
+        with self.at(0):
+            token = issue_token(self.user)["token"]
+        with self.at(TOKEN_TTL - 60):
+            response = self.me(token)
+        self.assertEqual(response.status_code, 200)
+        renewed = response.data["token"]
+        self.assertEqual(response.data["expires_in"], TOKEN_TTL)
+        with self.at(TOKEN_TTL + 1):
+            self.assertRejected(self.me(token))
+            self.assertEqual(self.me(renewed).status_code, 200)
+
+    def test_renewals_stop_at_the_absolute_lifetime(self):
+        with self.at(0):
+            issued = issue_token(self.user, logged_in_at=self.now - TOKEN_MAX_LIFETIME + 100)
+        self.assertEqual(issued["expires_in"], 100)
+        with self.at(99):
+            self.assertEqual(user_for_token(issued["token"]), self.user)
+        with self.at(101):
+            self.assertIsNone(user_for_token(issued["token"]))
+
+    def test_rejected_tokens(self):
+        token = issue_token(self.user)["token"]
+        value, timestamp, signature = token.rsplit(":", 2)
+        forged = issue_token(User(pk=self.user.pk + 1, password=self.user.password))["token"]
+        for bad in (
+            f"{value}:{timestamp}:{signature[:-1]}{'A' if signature[-1] != 'A' else 'B'}",
+            f"{self.user.pk + 1}{value[len(str(self.user.pk)):]}:{timestamp}:{signature}",
+            forged,  # validly signed, for a user that doesn't exist
+            "not-a-token",
+        ):
+            with self.subTest(token=bad):
+                self.assertIsNone(user_for_token(bad))
+                self.assertRejected(self.me(bad))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token} extra")
+        self.assertRejected(self.client.get(self.me_url), "Invalid token header.")
+
+    def test_password_change_and_deactivation_revoke(self):
+        token = issue_token(self.user)["token"]
+        self.assertEqual(self.me(token).status_code, 200)
+        self.user.set_password("another-pass")
+        self.user.save()
+        self.assertRejected(self.me(token))
+
+        token = issue_token(self.user)["token"]
+        self.user.is_active = False
+        self.user.save()
+        self.assertRejected(self.me(token))
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "4/min",
+        "login_email": "2/min",
+        "signup_ip": "2/hour",
+        "password_reset_ip": "4/hour",
+        "password_reset_email": "2/hour",
+    },
+})
+class AuthThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def post(self, url, data, ip="203.0.113.7"):
+        return self.client.post(url, data, format="json", REMOTE_ADDR=ip)
+
+    def assertThrottled(self, response):
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+    def test_login_email_bucket(self):
+        User.objects.create_user(email="login@example.com", password="secret-pass")
+        attempt = {"email": "login@example.com", "password": "wrong"}
+        for _ in range(2):
+            self.assertEqual(self.post("/api/auth/login/", attempt).status_code, 400)
+        # refused before authenticate() gets to hash anything, even with the right password
+        with mock.patch("core.serializers.authenticate") as authenticate:
+            self.assertThrottled(self.post("/api/auth/login/", {**attempt, "password": "secret-pass"}))
+            self.assertThrottled(self.post("/api/auth/login/", {**attempt, "email": "LOGIN@example.com "}))
+        authenticate.assert_not_called()
+        # keyed by address: another one still gets through (from a fresh IP)
+        response = self.post("/api/auth/login/", {**attempt, "email": "other@example.com"}, ip="198.51.100.1")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(cache.get("stats:throttle:login_email:rejected"), 2)
+
+    def test_login_ip_bucket(self):
+        for i in range(4):
+            response = self.post("/api/auth/login/", {"email": f"user{i}@example.com", "password": "x"})
+            self.assertEqual(response.status_code, 400)
+        self.assertThrottled(self.post("/api/auth/login/", {"email": "user9@example.com", "password": "x"}))
+        response = self.post("/api/auth/login/", {"email": "user9@example.com", "password": "x"}, ip="198.51.100.1")
+        self.assertEqual(response.status_code, 400)
+
+    def test_forwarded_for_is_not_trusted_without_proxies(self):
+        for i in range(4):
+            response = self.client.post(
+                "/api/auth/login/", {"email": f"user{i}@example.com", "password": "x"}, format="json",
+                REMOTE_ADDR="203.0.113.7", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}",
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertThrottled(self.client.post(
+            "/api/auth/login/", {"email": "user9@example.com", "password": "x"}, format="json",
+            REMOTE_ADDR="203.0.113.7", HTTP_X_FORWARDED_FOR="10.0.0.9",
+        ))
+
+    def test_signup(self):
+        for i in range(2):
+            response = self.post("/api/auth/signup/", {"email": f"new{i}@example.com", "password": "secret-pass"})
+            self.assertEqual(response.status_code, 201)
+        self.assertThrottled(self.post("/api/auth/signup/", {"email": "new9@example.com", "password": "secret-pass"}))
+        self.assertFalse(User.objects.filter(email="new9@example.com").exists())
+
+    def test_password_reset(self):
+        User.objects.create_user(email="reset@example.com", password="secret-pass")
+        url = "/api/auth/password_reset/"
+        for _ in range(2):
+            self.assertEqual(self.post(url, {"email": "reset@example.com"}).status_code, 200)
+        self.assertThrottled(self.post(url, {"email": "reset@example.com"}))
+        # a different address still has its own bucket, until the IP one runs dry
+        self.assertNotEqual(self.post(url, {"email": "someone@example.com"}).status_code, 429)
+        self.assertThrottled(self.post(url, {"email": "someone-else@example.com"}))
+        self.assertThrottled(self.post(f"{url}confirm/", {"token": "x", "password": "another-pass"}))
+
+
+class NextDueTests(TestCase):
+    """``next_due`` on save and through the SWOTItemQuerySet bulk write overrides."""
+    # a Wednesday
+    now = datetime(2024, 5, 1, 12, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="next-due@example.com", password="x")
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch("django.utils.timezone.now", return_value=self.now))
+
+    def item(self, frequency, **fields):
+        return SWOTItem.objects.create(
+            owner=self.user, type="strength", description=frequency, frequency=frequency, **fields,
+        )
+
+    def assertNextDue(self, item, expected):
+        self.assertEqual(SWOTItem.objects.get(pk=item.pk).next_due, expected)
+
+    def test_save(self):
+        cases = [
+            (self.item("daily"), date(2024, 5, 1)),
+            (self.item("weekly", dow_mask=0b0000001), date(2024, 5, 6)),   # Mondays
+            (self.item("weekly", dow_mask=0b0001000), date(2024, 5, 2)),   # Thursdays
+            (self.item("weekly", dow_mask=0), date(2024, 5, 1)),           # created on a Wednesday
+            (self.item("monthly", month_day=31), date(2024, 5, 31)),
+            (self.item("monthly"), date(2024, 5, 1)),                      # created on the 1st
+            (self.item("quarterly", month_day=10), date(2024, 5, 10)),     # created in Q2
+        ]
+        for item, expected in cases:
+            with self.subTest(item.frequency):
+                self.assertNextDue(item, expected)
+
+        item = cases[0][0]
+        item.frequency, item.dow_mask = "weekly", 0b1000000  # Sundays
+        item.save(update_fields=["frequency", "dow_mask"])
+        self.assertNextDue(item, date(2024, 5, 5))
+
+    def test_update(self):
+        daily, monthly, quarterly = self.item("daily"), self.item("monthly", month_day=3), self.item("quarterly")
+        # the filter stops matching once frequency changes
+        self.assertEqual(SWOTItem.objects.filter(frequency="daily").update(frequency="monthly", month_day=20), 1)
+        self.assertNextDue(daily, date(2024, 5, 20))
+        SWOTItem.objects.filter(pk=quarterly.pk).update(created_at=datetime(2024, 2, 1, tzinfo=dt_timezone.utc))
+        self.assertNextDue(quarterly, date(2025, 1, 1))  # Q1 only
+
+        # non-schedule fields and explicit values are left alone
+        SWOTItem.objects.filter(pk=monthly.pk).update(description="renamed", active=False)
+        self.assertNextDue(monthly, date(2024, 5, 3))
+        SWOTItem.objects.filter(pk=monthly.pk).update(month_day=4, next_due=date(2030, 1, 1))
+        self.assertNextDue(monthly, date(2030, 1, 1))
+
+    def test_bulk_create(self):
+        items = SWOTItem.objects.bulk_create([
+            SWOTItem(owner=self.user, type="threat", description="w", frequency="weekly", dow_mask=0b0100000),
+            SWOTItem(owner=self.user, type="threat", description="m", frequency="monthly", month_day=30),
+            SWOTItem(owner=self.user, type="threat", description="x", frequency="daily", next_due=date(2024, 6, 1)),
+        ])
+        self.assertEqual([item.next_due for item in items], [date(2024, 5, 4), date(2024, 5, 30), date(2024, 6, 1)])
+
+    def test_bulk_update(self):
+        weekly, monthly = self.item("weekly", dow_mask=0b0000001), self.item("monthly", month_day=2)
+        # partial instances: the recompute reads the stored rows, not the objects
+        SWOTItem.objects.bulk_update(
+            [SWOTItem(pk=weekly.pk, dow_mask=0b0010000), SWOTItem(pk=monthly.pk, month_day=25)],
+            ["dow_mask", "month_day"],
+        )
+        self.assertNextDue(weekly, date(2024, 5, 3))
+        self.assertNextDue(monthly, date(2024, 5, 25))
+
+        SWOTItem.objects.filter(pk=monthly.pk).update(next_due=date(2030, 1, 1))
+        monthly.description = "renamed"
+        SWOTItem.objects.bulk_update([monthly], ["description"])
+        self.assertNextDue(monthly, date(2030, 1, 1))
+
+
+class ScheduledGenerationTests(TestCase):
+    """``generate_scheduled_tasks`` and ``_advance_next_due``, around a missed night."""
+    now = datetime(2024, 5, 1, 12, tzinfo=dt_timezone.utc)  # Wednesday
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch("django.utils.timezone.now", return_value=self.now))
+        self.user = User.objects.create_user(email="scheduled@example.com", password="x")
+        self.items = {
+            name: SWOTItem.objects.create(
+                owner=self.user, type="strength", description=name, frequency=frequency, **fields,
+            )
+            for name, frequency, fields in [
+                ("daily", "daily", {}),
+                ("mondays", "weekly", {"dow_mask": 0b0000001}),
+                ("thursdays", "weekly", {"dow_mask": 0b0001000}),
+                ("2nd", "monthly", {"month_day": 2}),
+                ("quarterly", "quarterly", {"month_day": 3}),
+                ("inactive", "daily", {"active": False}),
+            ]
+        }
+
+    def next_due(self):
+        return dict(SWOTItem.objects.values_list("description", "next_due"))
+
+    def task_days(self):
+        return sorted(Task.objects.values_list("swot_item__description", "date"))
+
+    def test_advance_next_due(self):
+        _advance_next_due(SWOTItem.objects.filter(active=True).for_generation(), date(2024, 5, 3))
+        self.assertEqual(self.next_due(), {
+            "daily": date(2024, 5, 4),
+            "mondays": date(2024, 5, 6),
+            "thursdays": date(2024, 5, 9),
+            "2nd": date(2024, 6, 2),
+            "quarterly": date(2024, 6, 3),
+            "inactive": date(2024, 5, 1),
+        })
+
+    def test_missed_night(self):
+        self.assertEqual(generate_scheduled_tasks(date(2024, 5, 1)), {"created": 1, "skipped": 0})
+        # the night of the 2nd is missed: the Thursday and monthly items lag
+        # behind, are read again on the 3rd and move on without a task
+        self.assertEqual(generate_scheduled_tasks(date(2024, 5, 3)), {"created": 2, "skipped": 0})
+        self.assertEqual(self.next_due(), {
+            "daily": date(2024, 5, 4),
+            "mondays": date(2024, 5, 6),
+            "thursdays": date(2024, 5, 9),
+            "2nd": date(2024, 6, 2),
+            "quarterly": date(2024, 6, 3),
+            "inactive": date(2024, 5, 1),
+        })
+        self.assertEqual(generate_scheduled_tasks(date(2024, 5, 6)), {"created": 2, "skipped": 0})
+        self.assertEqual(self.task_days(), [
+            ("daily", date(2024, 5, 1)),
+            ("daily", date(2024, 5, 3)),
+            ("daily", date(2024, 5, 6)),
+            ("mondays", date(2024, 5, 6)),
+            ("quarterly", date(2024, 5, 3)),
+        ])
+
+    def test_reactivated_item_is_picked_up(self):
+        SWOTItem.objects.filter(description="inactive").update(active=True)
+        generate_scheduled_tasks(date(2024, 5, 4))
+        self.assertIn(("inactive", date(2024, 5, 4)), self.task_days())
+
+
+class DeriveStreaksTests(TestCase):
+    """The window-function SQL against the Python derivation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        utc = dt_timezone.utc
+        # completion instants per user, in UTC
+        histories = {
+            "UTC": [
+                datetime(2024, 5, 1, 8, tzinfo=utc), datetime(2024, 5, 1, 20, tzinfo=utc),
+                datetime(2024, 5, 2, 9, tzinfo=utc),
+                datetime(2024, 5, 4, 9, tzinfo=utc), datetime(2024, 5, 5, 23, 59, tzinfo=utc),
+            ],
+            # 23:00 UTC is already the next day at UTC+14: three days in a row there
+            "Pacific/Kiritimati": [
+                datetime(2024, 5, 1, 9, tzinfo=utc), datetime(2024, 5, 1, 23, tzinfo=utc),
+                datetime(2024, 5, 3, 1, tzinfo=utc),
+            ],
+            # 03:00 UTC is still the previous evening at UTC-7
+            "America/Los_Angeles": [
+                datetime(2024, 3, 9, 3, tzinfo=utc), datetime(2024, 3, 10, 3, tzinfo=utc),
+                datetime(2024, 3, 11, 3, tzinfo=utc), datetime(2024, 5, 1, 3, tzinfo=utc),
+            ],
+            "Europe/Paris": [],
+        }
+        cls.users = {}
+        for zone, instants in histories.items():
+            user = User.objects.create_user(email=f"{len(cls.users)}@streaks.example.com", password="x", timezone=zone)
+            item = SWOTItem.objects.create(owner=user, type="strength", description="d", frequency="daily")
+            for i, instant in enumerate(instants):
+                Task.objects.create(
+                    owner=user, swot_item=item, date=instant.date() + timedelta(days=i), label="t",
+                    status="done", completed_at=instant,
+                )
+            # pending tasks never count
+            Task.objects.create(
+                owner=user, swot_item=item, date=date(2024, 5, 6), label="p",
+                completed_at=datetime(2024, 5, 6, tzinfo=utc),
+            )
+            cls.users[zone] = user
+
+    def python_streaks(self):
+        rows = [
+            {"owner_id": task.owner_id, "day": task.completed_at.astimezone(task.owner.zoneinfo).date()}
+            for task in Task.objects.filter(status="done").select_related("owner")
+        ]
+        return _streaks_from_days(rows)
+
+    def test_sql_matches_python(self):
+        ids = [user.pk for user in self.users.values()]
+        self.assertEqual(derive_streaks(ids), self.python_streaks())
+        with mock.patch.dict("core.streaks._DAY_NUMBER", clear=True):  # a backend without day-number SQL
+            self.assertEqual(derive_streaks(ids), self.python_streaks())
+
+    def test_values(self):
+        streaks = derive_streaks([user.pk for user in self.users.values()])
+        self.assertEqual(streaks, {
+            self.users["UTC"].pk: (2, date(2024, 5, 5)),
+            self.users["Pacific/Kiritimati"].pk: (3, date(2024, 5, 3)),
+            self.users["America/Los_Angeles"].pk: (1, date(2024, 4, 30)),
+        })
+        self.assertEqual(derive_streaks([self.users["Europe/Paris"].pk]), {})
+        self.assertEqual(derive_streaks([]), {})
+
+    def test_los_angeles_days(self):
+        la = self.users["America/Los_Angeles"]
+        with mock.patch.dict("core.streaks._DAY_NUMBER", clear=True):
+            self.assertEqual(derive_streaks([la.pk]), {la.pk: (1, date(2024, 4, 30))})
+        Task.objects.filter(owner=la, completed_at__month=5).delete()
+        self.assertEqual(derive_streaks([la.pk]), {la.pk: (3, date(2024, 3, 10))})
+
+
+class RecomputeStreaksTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.start = timezone.now()
+        self.users = [User.objects.create_user(email=f"{i}@recompute.example.com", password="x") for i in range(4)]
+        done_on = datetime(2024, 5, 2, 12, tzinfo=dt_timezone.utc)
+        for user in self.users[:3]:
+            item = SWOTItem.objects.create(owner=user, type="strength", description="d", frequency="daily")
+            for days_ago in (0, 1):
+                Task.objects.create(
+                    owner=user, swot_item=item, date=done_on.date(), label=f"t{days_ago}", status="done",
+                    completed_at=done_on - timedelta(days=days_ago),
+                )
+        correct, stale, live, no_history = self.users
+        Streak.objects.create(owner=correct, count=2, last_day=date(2024, 5, 2))
+        Streak.objects.create(owner=stale, count=7, last_day=date(2024, 4, 1))
+        Streak.objects.create(owner=live, count=7, last_day=date(2024, 4, 1))
+        Streak.objects.create(owner=no_history, count=3, last_day=date(2024, 4, 1))
+        Streak.objects.update(updated_at=self.start - timedelta(hours=1))
+
+    def stored(self):
+        return {
+            owner_id: (count, last_day)
+            for owner_id, count, last_day in Streak.objects.values_list("owner_id", "count", "last_day")
+        }
+
+    def test_dry_run(self):
+        before = self.stored()
+        result = recompute_streaks(dry_run=True)
+        self.assertEqual((result["checked"], result["mismatched"], result["fixed"]), (4, 3, 0))
+        self.assertEqual(self.stored(), before)
+
+    def test_fixes_only_rows_untouched_since_the_check(self):
+        correct, stale, live, no_history = self.users
+        # a completion lands after the batch's checked_at: that row is left alone
+        Streak.objects.filter(owner=live).update(updated_at=self.start + timedelta(hours=1))
+        with mock.patch("django.utils.timezone.now", return_value=self.start):
+            result = recompute_streaks(batch_size=2)
+        self.assertEqual((result["checked"], result["mismatched"], result["fixed"]), (4, 3, 2))
+        self.assertEqual(self.stored(), {
+            correct.pk: (2, date(2024, 5, 2)),
+            stale.pk: (2, date(2024, 5, 2)),
+            live.pk: (7, date(2024, 4, 1)),
+            no_history.pk: (0, None),
+        })
+
+
+class KeysetPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="pages@example.com", password="x")
+        cls.day = date(2024, 5, 1)
+        items = [
+            SWOTItem.objects.create(owner=cls.user, type="strength", description=f"i{i}", frequency="daily")
+            for i in range(7)
+        ]
+        # ties on created_at: only the id tells these rows apart
+        tied = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        SWOTItem.objects.filter(pk__in=[item.pk for item in items[1:6]]).update(created_at=tied)
+        SWOTItem.objects.filter(pk=items[0].pk).update(created_at=tied - timedelta(seconds=1))
+        cls.item_ids = [items[0].pk] + sorted(item.pk for item in items[1:6]) + [items[6].pk]
+        for item in items:
+            Task.objects.create(owner=cls.user, swot_item=item, date=cls.day, label=item.description)
+        Task.objects.filter(owner=cls.user).update(created_at=tied)
+        cls.task_ids = sorted(Task.objects.filter(owner=cls.user).values_list("pk", flat=True))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, params):
+        ids, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            pages += 1
+            if response.data["next"] is None:
+                return ids, pages
+            self.assertIn("page_size=3", response.data["next"])
+            response = self.client.get(response.data["next"])
+
+    def test_pages_through_ties(self):
+        self.assertEqual(self.walk("/api/swot/", {"page_size": 3}), (self.item_ids, 3))
+        self.assertEqual(self.walk("/api/tasks/", {"date": "2024-05-01", "page_size": 3}), (self.task_ids, 3))
+
+    def test_next_link(self):
+        response = self.client.get("/api/swot/", {"page_size": 7})
+        self.assertIsNone(response.data["next"])
+        response = self.client.get("/api/swot/", {"page_size": 6})
+        self.assertTrue(response.data["next"].startswith("http://testserver/api/swot/?"))
+        self.assertEqual([row["id"] for row in self.client.get(response.data["next"]).data["results"]],
+                         self.item_ids[6:])
+
+    def test_page_size_clamp(self):
+        for size, expected in (("0", 1), ("-5", 1), ("abc", 7), ("100", 7)):
+            with self.subTest(page_size=size):
+                self.assertEqual(len(self.client.get("/api/swot/", {"page_size": size}).data["results"]), expected)
+        with mock.patch.object(SWOTItemKeysetPagination, "max_page_size", 2):
+            response = self.client.get("/api/swot/", {"page_size": 100})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIn("page_size=2", response.data["next"])
+
+    def test_bad_cursor(self):
+        wrong_length = base64.urlsafe_b64encode(b'["2024-01-01T00:00:00Z"]').decode()
+        wrong_type = base64.urlsafe_b64encode(b'["not a date", "x"]').decode()
+        for cursor in ("garbage", "!!", wrong_length, wrong_type):
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/api/swot/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.data["detail"], "Invalid cursor.")
+
+    def test_unpaginated_shape(self):
+        response = self.client.get("/api/swot/")
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(sorted(row["id"] for row in response.data), sorted(self.item_ids))
+        response = self.client.get("/api/tasks/", {"date": "2024-05-01"})
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 7)
+
+    def test_etag_per_page(self):
+        full = self.client.get("/api/swot/")
+        first = self.client.get("/api/swot/", {"page_size": 3})
+        second = self.client.get(first.data["next"])
+        self.assertEqual(len({full["ETag"], first["ETag"], second["ETag"]}), 3)
+
+        response = self.client.get("/api/swot/", {"page_size": 3}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(first.data["next"], HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+
+class GenerateTasksForDateTests(TestCase):
+    day = date(2024, 5, 6)  # a Monday
+
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create_user(email=f"{i}@generate.example.com", password="x") for i in range(2)]
+        for user in self.users:
+            for frequency, fields in [("daily", {}), ("weekly", {"dow_mask": 0b0000001}),
+                                      ("weekly", {"dow_mask": 0b0000010}), ("monthly", {"month_day": 6})]:
+                SWOTItem.objects.create(
+                    owner=user, type="strength", description=frequency, frequency=frequency, **fields,
+                )
+            SWOTItem.objects.create(owner=user, type="threat", description="off", frequency="daily", active=False)
+
+    def stats(self):
+        return dict(DailyStats.objects.filter(date=self.day).values_list("owner_id", "total"))
+
+    def test_counts_and_rollup(self):
+        # small batches: several chunks per run
+        self.assertEqual(generate_tasks_for_date(self.day, batch_size=2), {"created": 6, "skipped": 0})
+        self.assertEqual(self.stats(), {user.pk: 3 for user in self.users})
+
+        self.assertEqual(generate_tasks_for_date(self.day, batch_size=2), {"created": 0, "skipped": 6})
+        self.assertEqual(Task.objects.filter(date=self.day).count(), 6)
+        self.assertEqual(self.stats(), {user.pk: 3 for user in self.users})
+
+        # a renamed item still has its task for the day (same swot_item and date)
+        SWOTItem.objects.filter(owner=self.users[0], frequency="daily").update(description="renamed")
+        Task.objects.filter(owner=self.users[1], swot_item__frequency="monthly").delete()
+        self.assertEqual(generate_tasks_for_date(self.day), {"created": 1, "skipped": 5})
+        self.assertFalse(Task.objects.filter(label="renamed").exists())
+        self.assertEqual(self.stats(), {user.pk: 3 for user in self.users})
+        self.assertEqual(
+            list(DailyStats.objects.filter(date=self.day).values_list("done", "value_sum").distinct()), [(0, 0.0)],
+        )
+
+
+class TaskListCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="list-cache@example.com", password="x")
+        self.client.force_authenticate(self.user)
+        self.item = SWOTItem.objects.create(owner=self.user, type="strength", description="d", frequency="daily")
+        self.task = Task.objects.create(
+            owner=self.user, swot_item=self.item, date=self.user.local_today(), label="first",
+        )
+
+    def read(self):
+        """GET today's list; returns ``(data, "hit" | "miss")``."""
+        before = cache_stats()
+        response = self.client.get("/api/tasks/")
+        self.assertEqual(response.status_code, 200)
+        after = cache_stats()
+        self.assertEqual(after["hits"] + after["misses"], before["hits"] + before["misses"] + 1)
+        return response.data, "hit" if after["hits"] > before["hits"] else "miss"
+
+    def test_hit_after_first_read(self):
+        data, outcome = self.read()
+        self.assertEqual(outcome, "miss")
+        with self.assertNumQueries(0):
+            cached, outcome = self.read()
+        self.assertEqual((cached, outcome), (data, "hit"))
+
+    def test_writes_invalidate(self):
+        writes = [
+            ("done", lambda: self.client.post(f"/api/tasks/{self.task.pk}/done/", {"value": 1}, format="json"),
+             lambda data: data[0]["status"] == "done"),
+            ("patch", lambda: self.client.patch(f"/api/tasks/{self.task.pk}/", {"label": "renamed"}, format="json"),
+             lambda data: data[0]["label"] == "renamed"),
+            ("swot create", lambda: self.client.post(
+                "/api/swot/", {"type": "threat", "description": "new", "frequency": "daily"}, format="json",
+            ), lambda data: len(data) == 2),
+            ("swot delete", lambda: self.client.delete(f"/api/swot/{self.item.pk}/"),
+             lambda data: len(data) == 1),
+        ]
+        for name, write, check in writes:
+            with self.subTest(name):
+                self.read()
+                self.assertEqual(self.read()[1], "hit")
+                self.assertLess(write().status_code, 300)
+                data, outcome = self.read()
+                self.assertEqual(outcome, "miss")
+                self.assertTrue(check(data), data)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="etag@example.com", password="x")
+        self.client.force_authenticate(self.user)
+        self.item = SWOTItem.objects.create(owner=self.user, type="strength", description="d", frequency="daily")
+        self.task = Task.objects.create(
+            owner=self.user, swot_item=self.item, date=self.user.local_today(), label="t",
+        )
+
+    def assertRevalidates(self, url, write):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertEqual(first["Cache-Control"], "private, no-cache")
+
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, 304, header)
+            self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+        self.assertLess(write().status_code, 300)
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh["ETag"], etag)
+        return fresh
+
+    def test_tasks(self):
+        fresh = self.assertRevalidates(
+            "/api/tasks/",
+            lambda: self.client.patch(f"/api/tasks/{self.task.pk}/", {"label": "renamed"}, format="json"),
+        )
+        self.assertEqual(fresh.data[0]["label"], "renamed")
+
+    def test_swot(self):
+        fresh = self.assertRevalidates(
+            "/api/swot/",
+            lambda: self.client.patch(f"/api/swot/{self.item.pk}/", {"description": "renamed"}, format="json"),
+        )
+        self.assertEqual(fresh.data[0]["description"], "renamed")
+
+    def test_streak(self):
+        fresh = self.assertRevalidates(
+            "/api/streak/", lambda: self.client.post(f"/api/tasks/{self.task.pk}/done/"),
+        )
+        self.assertEqual(fresh.data["count"], 1)
+
+    def test_etags_are_per_user(self):
+        etag = self.client.get("/api/swot/")["ETag"]
+        other = User.objects.create_user(email="etag-other@example.com", password="x")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get("/api/swot/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(TASK_GENERATION_MODE="lazy", TASK_GENERATION_LAZY_MAX_DAYS_AHEAD=31)
+class LazyMaterializationTests(APITestCase):
+    now = datetime(2024, 5, 1, 12, tzinfo=dt_timezone.utc)  # Wednesday
+    today = date(2024, 5, 1)
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch("django.utils.timezone.now", return_value=self.now))
+        self.user = User.objects.create_user(email="lazy@example.com", password="x")
+        self.client.force_authenticate(self.user)
+        SWOTItem.objects.create(owner=self.user, type="strength", description="daily", frequency="daily")
+        self.mondays = SWOTItem.objects.create(
+            owner=self.user, type="weakness", description="mondays", frequency="weekly", dow_mask=0b0000001,
+        )
+
+    def labels(self, day):
+        return sorted(Task.objects.filter(owner=self.user, date=day).values_list("label", flat=True))
+
+    def test_writes_once(self):
+        self.assertEqual(materialize_day(self.user, self.today), 1)
+        self.assertTrue(DailyStats.objects.get(owner=self.user, date=self.today).materialized)
+        with self.assertNumQueries(0):  # the cache marker
+            self.assertEqual(materialize_day(self.user, self.today), 0)
+
+        # without the marker, the DailyStats flag still stops a re-check
+        Task.objects.filter(owner=self.user).delete()
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(materialize_day(self.user, self.today), 0)
+        self.assertEqual(self.labels(self.today), [])
+
+    def test_list_materializes(self):
+        response = self.client.get("/api/tasks/", {"date": "2024-05-06"})
+        self.assertEqual([row["label"] for row in response.data], ["daily", "mondays"])
+
+    def test_swot_edit_resets(self):
+        materialize_day(self.user, self.today)
+        response = self.client.patch(f"/api/swot/{self.mondays.pk}/", {"frequency": "daily"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(DailyStats.objects.get(owner=self.user, date=self.today).materialized)
+        self.assertEqual(materialize_day(self.user, self.today), 1)
+        self.assertEqual(self.labels(self.today), ["daily", "mondays"])
+
+    def test_window(self):
+        for day in (self.today - timedelta(days=1), self.today + timedelta(days=32)):
+            with self.subTest(day=day):
+                self.assertEqual(materialize_day(self.user, day), 0)
+                self.assertEqual(self.labels(day), [])
+                self.assertFalse(DailyStats.objects.filter(owner=self.user, date=day).exists())
+        self.assertEqual(materialize_day(self.user, self.today + timedelta(days=31)), 1)
+
+    def test_uses_the_owners_today(self):
+        # 12:00 UTC is 02:00 the next day at UTC+14: "today" there is May 2nd
+        self.user.timezone = "Pacific/Kiritimati"
+        self.user.save()
+        self.assertEqual(materialize_day(self.user, self.today), 0)
+        self.assertEqual(materialize_day(self.user, self.today + timedelta(days=1)), 1)
+
+    @override_settings(TASK_GENERATION_MODE="nightly")
+    def test_off_in_nightly_mode(self):
+        self.assertEqual(materialize_day(self.user, self.today), 0)
+        self.assertEqual(self.labels(self.today), [])
+
+
+class RollingGenerationTests(TestCase):
+    # 23:50 in Paris (CEST, UTC+2), 21:50 UTC, 17:50 in New York, 11:50 May 2nd at UTC+14
+    now = datetime(2024, 5, 1, 21, 50, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {}
+        for name in ("Europe/Paris", "UTC", "America/New_York", "Pacific/Kiritimati"):
+            user = User.objects.create_user(email=f"{len(cls.users)}@rolling.example.com", password="x", timezone=name)
+            with mock.patch("django.utils.timezone.now", return_value=cls.now):
+                SWOTItem.objects.create(owner=user, type="strength", description=name, frequency="daily")
+            cls.users[name] = user
+        broken = User.objects.create_user(email="broken@rolling.example.com", password="x")
+        User.objects.filter(pk=broken.pk).update(timezone="Mars/Olympus_Mons")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_just_before_midnight(self):
+        self.assertEqual(timezones_nearing_midnight(self.now), {"Europe/Paris": date(2024, 5, 2)})
+        # UTC's midnight is 2h10 away: in the window only once it is wide enough
+        self.assertEqual(
+            timezones_nearing_midnight(self.now, timedelta(hours=2, minutes=10)),
+            {"Europe/Paris": date(2024, 5, 2), "UTC": date(2024, 5, 2)},
+        )
+        self.assertEqual(timezones_nearing_midnight(self.now, timedelta(minutes=9)), {})
+        # just past Paris midnight, its next one is a day away
+        self.assertEqual(timezones_nearing_midnight(self.now + timedelta(minutes=11)), {})
+
+    def test_only_that_buckets_owners(self):
+        result = generate_tasks_for_timezones(interval_minutes=60, now=self.now)
+        self.assertEqual(result, {"created": 1, "skipped": 0, "timezones": ["Europe/Paris"]})
+        self.assertEqual(
+            list(Task.objects.values_list("owner_id", "date")), [(self.users["Europe/Paris"].pk, date(2024, 5, 2))],
+        )
+        # a rerun inside the slack window adds nothing
+        result = generate_tasks_for_timezones(interval_minutes=60, now=self.now + timedelta(minutes=5))
+        self.assertEqual((result["created"], Task.objects.count()), (0, 1))
+
+    @override_settings(TASK_GENERATION_MODE="lazy")
+    def test_off_in_lazy_mode(self):
+        self.assertEqual(
+            generate_tasks_for_timezones(now=self.now), {"created": 0, "skipped": 0, "timezones": []},
+        )
+        self.assertFalse(Task.objects.exists())
+
+
+class ExportTests(APITestCase):
+    url = "/api/tasks/export/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="export@example.com", password="x")
+        item = SWOTItem.objects.create(owner=cls.user, type="strength", description="d", frequency="daily")
+        cls.days = [date(2024, 5, 1) + timedelta(days=i) for i in range(5)]
+        for day in reversed(cls.days):
+            Task.objects.create(owner=cls.user, swot_item=item, date=day, label=f'say "hi", {day}')
+        Task.objects.filter(date=cls.days[0]).update(
+            status="done", value=1.5, completed_at=datetime(2024, 5, 1, 9, tzinfo=dt_timezone.utc),
+        )
+        other = User.objects.create_user(email="export-other@example.com", password="x")
+        other_item = SWOTItem.objects.create(owner=other, type="threat", description="d", frequency="daily")
+        Task.objects.create(owner=other, swot_item=other_item, date=cls.days[0], label="not yours")
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def export(self, params=None, **headers):
+        response = self.client.get(self.url, params or {}, **headers)
+        body = b"".join(response.streaming_content).decode() if response.streaming else None
+        return response, body
+
+    def assertCSV(self, response, body, days):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="tasks.csv"')
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], ["id", "swot_item", "date", "label", "status", "value", "created_at", "completed_at"])
+        self.assertEqual([row[2] for row in rows[1:]], [day.isoformat() for day in days])
+        return rows
+
+    def test_csv_by_default(self):
+        rows = self.assertCSV(*self.export(), self.days)
+        self.assertEqual(rows[1][3:6], ['say "hi", 2024-05-01', "done", "1.5"])
+        self.assertEqual(rows[1][7], "2024-05-01T09:00:00Z")
+        self.assertEqual((rows[2][5], rows[2][7]), ("", ""))  # no value, not completed
+        # axios and friends send Accept: application/json
+        self.assertCSV(*self.export(HTTP_ACCEPT="application/json, text/plain, */*"), self.days)
+        self.assertCSV(*self.export({"format": "csv"}), self.days)
+
+    def test_ndjson(self):
+        for response, body in (self.export({"format": "ndjson"}), self.export(HTTP_ACCEPT="application/x-ndjson")):
+            self.assertEqual(response["Content-Type"], "application/x-ndjson")
+            rows = [json.loads(line) for line in body.splitlines()]
+            self.assertEqual([row["date"] for row in rows], [day.isoformat() for day in self.days])
+            self.assertEqual((rows[0]["status"], rows[0]["value"]), ("done", 1.5))
+
+    def test_bad_format(self):
+        for fmt in ("json", "xml"):
+            with self.subTest(format=fmt):
+                response, _ = self.export({"format": fmt})
+                self.assertEqual(response.status_code, 400)
+
+    def test_date_range(self):
+        self.assertCSV(*self.export({"start": "2024-05-02", "end": "2024-05-04"}), self.days[1:4])
+        self.assertCSV(*self.export({"start": "2024-05-04"}), self.days[3:])
+        self.assertCSV(*self.export({"end": "2024-05-01"}), self.days[:1])
+        self.assertEqual(self.export({"start": "05/02/2024"})[0].status_code, 400)
+
+
+class DailyStatsRollupTests(APITestCase):
+    now = datetime(2024, 5, 1, 12, tzinfo=dt_timezone.utc)
+    today = date(2024, 5, 1)
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch("django.utils.timezone.now", return_value=self.now))
+        self.user = User.objects.create_user(email="rollup@example.com", password="x")
+        self.client.force_authenticate(self.user)
+
+    def rollup(self):
+        # rows left at zero (a day emptied by a move or delete) read the same as no row
+        return {
+            (owner_id, day): (total, done, value_sum)
+            for owner_id, day, total, done, value_sum in DailyStats.objects.filter(total__gt=0)
+            .values_list("owner_id", "date", "total", "done", "value_sum")
+        }
+
+    def assertMatchesRebuild(self):
+        live = self.rollup()
+        with transaction.atomic():
+            rebuild_daily_stats()
+            rebuilt = self.rollup()
+            transaction.set_rollback(True)
+        self.assertEqual(live, rebuilt)
+
+    def create_item(self, description):
+        response = self.client.post(
+            "/api/swot/", {"type": "strength", "description": description, "frequency": "daily"}, format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def task(self, day, description):
+        return Task.objects.get(owner=self.user, date=day, swot_item__description=description)
+
+    def test_stays_equal_to_rebuild(self):
+        kept, doomed = self.create_item("kept"), self.create_item("doomed")  # each writes today's task
+        self.assertMatchesRebuild()
+        generate_tasks_for_date(self.today + timedelta(days=1))
+        generate_scheduled_tasks(self.today + timedelta(days=2))
+        self.assertMatchesRebuild()
+        self.assertEqual(self.rollup()[(self.user.pk, self.today)], (2, 0, 0.0))
+
+        task = self.task(self.today, "kept")
+        self.client.post(f"/api/tasks/{task.pk}/done/", {"value": 2.5}, format="json")
+        self.client.post("/api/tasks/bulk_done/", [{"id": self.task(self.today, "doomed").pk}], format="json")
+        self.assertMatchesRebuild()
+        self.assertEqual(self.rollup()[(self.user.pk, self.today)], (2, 2, 2.5))
+
+        response = self.client.patch(f"/api/tasks/{task.pk}/", {"value": 4}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertMatchesRebuild()
+
+        # moving a task changes both days
+        moved = self.task(self.today + timedelta(days=1), "kept")
+        response = self.client.patch(
+            f"/api/tasks/{moved.pk}/", {"date": (self.today + timedelta(days=3)).isoformat()}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertMatchesRebuild()
+        self.assertEqual(self.rollup()[(self.user.pk, self.today + timedelta(days=3))], (1, 0, 0.0))
+
+        self.assertEqual(self.client.delete(f"/api/swot/{doomed}/").status_code, 204)
+        self.assertMatchesRebuild()
+        self.assertEqual(self.rollup()[(self.user.pk, self.today)], (1, 1, 4.0))
+        self.assertTrue(SWOTItem.objects.filter(pk=kept).exists())
+
+    def test_summary_reads_the_rollup(self):
+        DailyStats.objects.create(owner=self.user, date=self.today, total=9, done=4, value_sum=7.5)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/tasks/summary/", {"start": "2024-04-30", "end": "2024-05-01"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            {"date": date(2024, 4, 30), "done": 0, "total": 0, "value_sum": 0.0},
+            {"date": self.today, "done": 4, "total": 9, "value_sum": 7.5},
+        ])
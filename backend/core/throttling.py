@@ -0,0 +1,137 @@
+"""
+Token-bucket throttles for the unauthenticated auth endpoints.
+
+Login, signup and password reset each run (or can trigger) a deliberately
+slow password hash. These throttles run in DRF's ``initial()``, before the
+view does any work, so a credential-stuffing burst is turned away without
+hashing. Buckets live in the Django cache (locmem locally, Redis in
+production) and are keyed by client IP and, where the body carries one,
+by email. Rates come from REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] as
+"N/period": bursts of N, refilled at N per period.
+
+Reads and writes of a bucket are not atomic, so concurrent requests can
+slip a few attempts past the limit; that's fine for CPU protection.
+"""
+import hashlib
+import math
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .caching import _incr
+
+_PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+_REJECTED_KEY = "stats:throttle:{scope}:rejected"
+_HASHES_AVOIDED_KEY = "stats:throttle:hashes_avoided"
+
+
+class TokenBucket:
+    """``capacity`` tokens, refilled continuously at ``capacity`` per ``period`` seconds."""
+
+    def __init__(self, scope, capacity, period):
+        self.scope = scope
+        self.capacity = capacity
+        self.rate = capacity / period
+        # an untouched bucket is full again after this long, so it can expire
+        self.timeout = math.ceil(period)
+
+    @classmethod
+    def from_rate(cls, scope, rate):
+        count, period = rate.split("/")
+        return cls(scope, int(count), _PERIODS[period[0]])
+
+    def consume(self, key):
+        """Take one token for ``key``. Returns ``(allowed, seconds until a token is available)``."""
+        now = time.time()
+        cache_key = f"throttle:{self.scope}:{key}"
+        tokens, stamp = cache.get(cache_key) or (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - stamp) * self.rate)
+        if tokens >= 1:
+            cache.set(cache_key, (tokens - 1, now), self.timeout)
+            return True, 0.0
+        cache.set(cache_key, (tokens, now), self.timeout)
+        return False, (1 - tokens) / self.rate
+
+
+class BucketThrottle(BaseThrottle):
+    """Base class; subclasses set ``scope`` and implement ``get_key``."""
+    scope = None
+    # the throttled view hashes a password, so a rejection saves one hash
+    hashes_password = True
+
+    def __init__(self):
+        self.bucket = TokenBucket.from_rate(self.scope, api_settings.DEFAULT_THROTTLE_RATES[self.scope])
+        self._wait = None
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        key = self.get_key(request)
+        if key is None:
+            return True
+        allowed, self._wait = self.bucket.consume(key)
+        if not allowed:
+            _incr(_REJECTED_KEY.format(scope=self.scope))
+            # count each rejected request once, however many buckets refused it
+            if self.hashes_password and not getattr(request, "_throttle_counted", False):
+                request._throttle_counted = True
+                _incr(_HASHES_AVOIDED_KEY)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class IPThrottle(BucketThrottle):
+    def get_key(self, request):
+        # REMOTE_ADDR, or the address NUM_PROXIES trusted proxies put in X-Forwarded-For
+        return self.get_ident(request)
+
+
+class EmailThrottle(BucketThrottle):
+    def get_key(self, request):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # hashed: bounded, cache-safe keys that don't store addresses
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = "login_ip"
+
+
+class LoginEmailThrottle(EmailThrottle):
+    scope = "login_email"
+
+
+class SignupIPThrottle(IPThrottle):
+    scope = "signup_ip"
+
+
+class PasswordResetIPThrottle(IPThrottle):
+    """Reset request / token validation: no hashing, but email and DB work."""
+    scope = "password_reset_ip"
+    hashes_password = False
+
+
+class PasswordResetEmailThrottle(EmailThrottle):
+    scope = "password_reset_email"
+    hashes_password = False
+
+
+class PasswordResetConfirmThrottle(IPThrottle):
+    """Setting the new password hashes it; shares the reset IP bucket."""
+    scope = "password_reset_ip"
+
+
+def throttle_stats():
+    scopes = sorted(api_settings.DEFAULT_THROTTLE_RATES)
+    rejected = cache.get_many([_REJECTED_KEY.format(scope=scope) for scope in scopes])
+    return {
+        "rejected": {scope: rejected.get(_REJECTED_KEY.format(scope=scope), 0) for scope in scopes},
+        "hashes_avoided": cache.get(_HASHES_AVOIDED_KEY, 0),
+    }
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SWOTItemViewSet, TaskViewSet, streak_view
+from .async_views import dashboard_view
+from .views import SWOTItemViewSet, TaskViewSet, metrics_view, streak_view, sync_view
 
 router = DefaultRouter()
 router.register(r"swot", SWOTItemViewSet, basename="swot")
@@ -9,4 +10,7 @@ router.register(r"tasks", TaskViewSet, basename="tasks")
 urlpatterns = [
     path("", include(router.urls)),          # /api/swot/, /api/tasks/
     path("streak/", streak_view, name="streak"),  # /api/streak/
+    path("dashboard/", dashboard_view, name="dashboard"),  # /api/dashboard/ (async)
+    path("sync/", sync_view, name="sync"),  # /api/sync/?since=<cursor>
+    path("metrics/", metrics_view, name="metrics"),  # /api/metrics/ (staff)
 ]
@@ -1,22 +1,47 @@
 # core/views.py
-from datetime import datetime
+import csv
+import io
+import json
+import math
+from datetime import datetime, timedelta
 from django.utils import timezone
 from django.contrib.auth import login, logout
+from django.http import Http404, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils.http import parse_etags
 from django.views.decorators.csrf import ensure_csrf_cookie
 
 from rest_framework import generics, status, viewsets
 from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 
 from .serializers import (
-    SignupSerializer, LoginSerializer,
-    SWOTItemSerializer, TaskSerializer, StreakSerializer
+    SignupSerializer, LoginSerializer, ProfileSerializer,
+    SWOTItemSerializer, TaskSerializer, StreakSerializer,
+    swot_item_rows, task_rows,
 )
-from .models import SWOTItem, Task, Streak
+from .authentication import SignedTokenAuthentication, issue_token, renew_token, user_cache
+from .caching import (
+    bump_revisions, cache_stats, get_revision, get_task_list, invalidate_task_lists, set_task_list,
+)
+from .metrics import connection_snapshot, snapshot as request_metrics_snapshot
+from .pagination import SWOTItemKeysetPagination, TaskKeysetPagination
+from .models import DailyStats, SWOTItem, Task, Streak, SyncTombstone
+from .renderers import CSVRenderer, NDJSONRenderer
+from .sync import InvalidCursor, changes_since
+from .throttling import LoginEmailThrottle, LoginIPThrottle, SignupIPThrottle, throttle_stats
 from .services import (
     generate_tasks_for_date,
     generate_tasks_for_swot_item,
+    materialize_day,
+    record_completions,
+    refresh_daily_stats,
+    reset_materialized_days,
     update_streak_for_user,
 )
 
@@ -28,18 +53,21 @@ from .services import (
 class SignupView(generics.CreateAPIView):
     serializer_class = SignupSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [SignupIPThrottle]
 
 
 class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [AllowAny]
+    # checked before authenticate(), so rejected attempts never hash
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data["user"]
         login(request, user)
-        return Response({"id": user.id, "email": user.email})
+        return Response({"id": user.id, "email": user.email, **issue_token(user)})
 
 
 @api_view(["POST"])
@@ -57,18 +85,89 @@ def csrf_view(_request):
     return Response({"detail": "CSRF cookie set"})
 
 
-@api_view(["GET"])
+@api_view(["GET", "PATCH"])
 @permission_classes([IsAuthenticated])
 def me_view(request):
-    """Return the currently logged-in user."""
+    """
+    Return the currently logged-in user; PATCH updates their timezone.
+
+    Session users get a bearer token. Bearer users get a renewed one
+    (``token``/``expires_in``) only near expiry, and never past the
+    token's absolute lifetime.
+    """
     user = request.user
+    if request.method == "PATCH":
+        serializer = ProfileSerializer(user, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+    if isinstance(request.successful_authenticator, SignedTokenAuthentication):
+        token = renew_token(user, request.auth)
+    else:
+        token = issue_token(user)
     return Response({
         "id": user.id,
         "email": user.email,
+        "timezone": user.timezone,
         "created_at": user.date_joined,
+        **(token or {}),
     })
 
 
+# -------------------
+# Helpers
+# -------------------
+
+def _parse_date(value):
+    """Parse YYYY-MM-DD; returns None when the value is malformed."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _datetime_str(value):
+    """Same ISO 8601 form as DRF's DateTimeField."""
+    if value is None:
+        return None
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def _format_etag(scope, user_id, revision, *parts):
+    return '"' + "-".join(str(p) for p in (scope, user_id, revision, *parts)) + '"'
+
+
+def _etag_for(request, scope, *parts, revision=None):
+    """ETag from the user's revision stamp for ``scope`` (no DB access)."""
+    user_id = request.user.id
+    if revision is None:
+        revision = get_revision(user_id, scope)
+    # each page of a paginated listing is its own representation
+    parts += tuple(request.query_params.get(p, "") for p in ("page_size", "cursor") if p in request.query_params)
+    return _format_etag(scope, user_id, revision, *parts)
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return etag in {tag.removeprefix("W/") for tag in parse_etags(header)}
+
+
+def _not_modified(etag):
+    return _with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+
+def _with_etag(response, etag):
+    response["ETag"] = etag
+    # let browsers keep the body but always revalidate
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
 # -------------------
 # Mixins
 # -------------------
@@ -87,13 +186,46 @@ class SWOTItemViewSet(IsOwnerQuerysetMixin, viewsets.ModelViewSet):
     queryset = SWOTItem.objects.all()
     serializer_class = SWOTItemSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SWOTItemKeysetPagination  # opt-in: ?page_size=N
+
+    def list(self, request, *args, **kwargs):
+        etag = _etag_for(request, "swot")
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        if self.paginator.is_requested(request):
+            return _with_etag(super().list(request, *args, **kwargs), etag)
+        # Full list: plain dicts from .values(), same shape as the serializer
+        qs = self.filter_queryset(self.get_queryset())
+        return _with_etag(Response(swot_item_rows.render(qs)), etag)
 
     def perform_create(self, serializer):
         swot = serializer.save()  # owner is set in serializer.create()
+        bump_revisions([swot.owner_id], "swot")
+        reset_materialized_days(self.request.user)
 
         # Generate today's task(s) immediately for this new SWOT
-        today = timezone.localdate()
-        generate_tasks_for_swot_item(swot, today)
+        today = self.request.user.local_today()
+        if generate_tasks_for_swot_item(swot, today):
+            invalidate_task_lists([(swot.owner_id, today)])
+
+    def perform_update(self, serializer):
+        swot = serializer.save()
+        bump_revisions([swot.owner_id], "swot")
+        reset_materialized_days(self.request.user)
+
+    def perform_destroy(self, instance):
+        # Deleting an item cascades to its tasks, so their days change too
+        owner_id = self.request.user.id
+        tasks = list(instance.tasks.values_list("id", "date"))
+        with transaction.atomic():
+            SyncTombstone.objects.bulk_create(
+                [SyncTombstone(owner_id=owner_id, model="swot", object_id=instance.pk)]
+                + [SyncTombstone(owner_id=owner_id, model="task", object_id=pk) for pk, _ in tasks]
+            )
+            instance.delete()
+            refresh_daily_stats({(owner_id, day) for _, day in tasks})
+        bump_revisions([owner_id], "swot")
+        invalidate_task_lists({(owner_id, day) for _, day in tasks})
 
 
 # -------------------
@@ -104,56 +236,267 @@ class TaskViewSet(IsOwnerQuerysetMixin, viewsets.ModelViewSet):
     queryset = Task.objects.select_related("swot_item").all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TaskKeysetPagination  # opt-in: ?page_size=N
     http_method_names = ["get", "post", "patch", "put", "head", "options"]  # no delete for MVP
+    SUMMARY_MAX_DAYS = 366
+    BULK_DONE_MAX = 200
+    # Export: rows per server-side cursor fetch / per streamed chunk
+    EXPORT_CHUNK_SIZE = 2000
+    EXPORT_FIELDS = ("id", "swot_item_id", "date", "label", "status", "value", "created_at", "completed_at")
+    EXPORT_MEDIA_TYPES = {CSVRenderer.format: CSVRenderer.media_type, NDJSONRenderer.format: NDJSONRenderer.media_type}
+
+    def perform_content_negotiation(self, request, force=False):
+        try:
+            return super().perform_content_negotiation(request, force)
+        except Http404:
+            # an unknown ?format= on export is a bad request, not a missing page
+            if self.action == "export":
+                raise ParseError("format must be csv or ndjson.")
+            raise
 
     def list(self, request, *args, **kwargs):
-        # /api/tasks/?date=YYYY-MM-DD  (default = today)
+        # /api/tasks/?date=YYYY-MM-DD  (default = the user's today)
         date_param = request.query_params.get("date")
         if date_param:
-            try:
-                target_date = datetime.strptime(date_param, "%Y-%m-%d").date()
-            except ValueError:
+            target_date = _parse_date(date_param)
+            if target_date is None:
                 return Response({"detail": "Invalid date format YYYY-MM-DD."}, status=400)
         else:
-            target_date = timezone.localdate()
+            target_date = request.user.local_today()
+
+        # lazy generation mode: write the day's due tasks on first read
+        materialize_day(request.user, target_date)
+        # read before the query: a write in between orphans what we cache below
+        revision = get_revision(request.user.id, "tasks")
+        etag = _etag_for(request, "tasks", target_date, revision=revision)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
 
         qs = self.get_queryset().filter(date=target_date).order_by("created_at")
         page = self.paginate_queryset(qs)
         if page is not None:
-            return self.get_paginated_response(self.get_serializer(page, many=True).data)
-        return Response(self.get_serializer(qs, many=True).data)
+            return _with_etag(self.get_paginated_response(self.get_serializer(page, many=True).data), etag)
+
+        data = get_task_list(request.user.id, target_date, revision)
+        if data is None:
+            data = task_rows.render(qs)
+            set_task_list(request.user.id, target_date, revision, data)
+        return _with_etag(Response(data), etag)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            task = serializer.save()
+            refresh_daily_stats([(task.owner_id, task.date)])
+        invalidate_task_lists([(task.owner_id, task.date)])
+
+    def perform_update(self, serializer):
+        old_date = serializer.instance.date
+        with transaction.atomic():
+            task = serializer.save()
+            days = {(task.owner_id, old_date), (task.owner_id, task.date)}
+            refresh_daily_stats(days)
+        invalidate_task_lists(days)
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        # /api/tasks/summary/?start=YYYY-MM-DD&end=YYYY-MM-DD  (default = last 7 days)
+        today = request.user.local_today()
+        start_param = request.query_params.get("start")
+        end_param = request.query_params.get("end")
+        end = _parse_date(end_param) if end_param else today
+        start = _parse_date(start_param) if start_param else (end and end - timedelta(days=6))
+        if start is None or end is None:
+            return Response({"detail": "Invalid date format YYYY-MM-DD."}, status=400)
+        if start > end:
+            return Response({"detail": "start must not be after end."}, status=400)
+        if (end - start).days >= self.SUMMARY_MAX_DAYS:
+            return Response({"detail": f"Range is limited to {self.SUMMARY_MAX_DAYS} days."}, status=400)
+
+        # One rollup row per day instead of counting tasks
+        rows = (
+            DailyStats.objects.filter(owner=request.user, date__range=(start, end))
+            .values_list("date", "done", "total", "value_sum")
+        )
+        by_date = {day: (done, total, value_sum) for day, done, total, value_sum in rows}
+
+        days = []
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            done, total, value_sum = by_date.get(day, (0, 0, 0.0))
+            days.append({"date": day, "done": done, "total": total, "value_sum": value_sum})
+        return Response(days)
+
+    @action(detail=False, methods=["get"], renderer_classes=[CSVRenderer, NDJSONRenderer, JSONRenderer])
+    def export(self, request):
+        # /api/tasks/export/?format=csv|ndjson&start=YYYY-MM-DD&end=YYYY-MM-DD  (default = csv, all history)
+        fmt = request.accepted_renderer.format
+        if fmt not in self.EXPORT_MEDIA_TYPES:
+            if self.format_kwarg or request.query_params.get(api_settings.URL_FORMAT_OVERRIDE):
+                return Response({"detail": "format must be csv or ndjson."}, status=400)
+            fmt = "csv"  # no ?format=, Accept negotiated JSON (e.g. axios' default)
+
+        qs = self.get_queryset()
+        for param, lookup in (("start", "date__gte"), ("end", "date__lte")):
+            value = request.query_params.get(param)
+            if value:
+                day = _parse_date(value)
+                if day is None:
+                    return Response({"detail": "Invalid date format YYYY-MM-DD."}, status=400)
+                qs = qs.filter(**{lookup: day})
+
+        # Tuples straight off a server-side cursor: constant memory, no model instances
+        rows = (
+            qs.order_by("date", "created_at", "id")
+            .values_list(*self.EXPORT_FIELDS)
+            .iterator(chunk_size=self.EXPORT_CHUNK_SIZE)
+        )
+        stream = self._export_csv(rows) if fmt == "csv" else self._export_ndjson(rows)
+        response = StreamingHttpResponse(stream, content_type=self.EXPORT_MEDIA_TYPES[fmt])
+        response["Content-Disposition"] = f'attachment; filename="tasks.{fmt}"'
+        return response
+
+    def _export_rows(self, rows):
+        for pk, swot_item, day, label, task_status, value, created_at, completed_at in rows:
+            yield (pk, swot_item, day.isoformat(), label, task_status, value,
+                   _datetime_str(created_at), _datetime_str(completed_at))
+
+    def _export_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(field.removesuffix("_id") for field in self.EXPORT_FIELDS)
+        for i, row in enumerate(self._export_rows(rows), 1):
+            writer.writerow(row)
+            if i % self.EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def _export_ndjson(self, rows):
+        keys = [field.removesuffix("_id") for field in self.EXPORT_FIELDS]
+        lines = []
+        for row in self._export_rows(rows):
+            lines.append(json.dumps(dict(zip(keys, row))))
+            if len(lines) >= self.EXPORT_CHUNK_SIZE:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
 
     @action(detail=True, methods=["post"])
     def done(self, request, pk=None):
         task: Task = self.get_object()
-        today = timezone.localdate()
+        today = request.user.local_today()
 
         if task.date < today:
             return Response({"detail": "Past tasks are immutable."}, status=status.HTTP_400_BAD_REQUEST)
         if task.status == "done":
             return Response({"detail": "Already done."}, status=status.HTTP_200_OK)
 
-        task.status = "done"
-        task.completed_at = timezone.now()
-
         # Optional: accept a metric value
+        now = timezone.now()
+        changes = {"status": "done", "completed_at": now, "updated_at": now}
         value = request.data.get("value")
         if value is not None:
             try:
                 val = float(value)
-            except (TypeError, ValueError):
+            except (TypeError, ValueError, OverflowError):
+                return Response({"detail": "Invalid value"}, status=400)
+            if not math.isfinite(val):  # float() accepts "nan" and "inf"
                 return Response({"detail": "Invalid value"}, status=400)
             if val < 0:
                 return Response({"detail": "value must be >= 0"}, status=400)
-            task.value = val
+            changes["value"] = val
 
-        task.save()
+        # Conditional UPDATE: of two concurrent requests only one completes the task
+        with transaction.atomic():
+            if not Task.objects.filter(pk=task.pk).exclude(status="done").update(**changes):
+                return Response({"detail": "Already done."}, status=status.HTTP_200_OK)
+            record_completions(task.owner_id, [(task.date, changes.get("value", task.value))])
+        for field, field_value in changes.items():
+            setattr(task, field, field_value)
+        invalidate_task_lists([(task.owner_id, task.date)])
 
         # Update streak when first done task today is marked
         update_streak_for_user(request.user)
 
         return Response(self.get_serializer(task).data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["post"])
+    def bulk_done(self, request):
+        # POST /api/tasks/bulk_done/  [{"id": 1, "value": 2.5}, {"id": 2}, ...]
+        entries = request.data.get("tasks") if isinstance(request.data, dict) else request.data
+        if not isinstance(entries, list) or not entries:
+            return Response({"detail": "Expected a non-empty list of {id, value}."}, status=400)
+        if len(entries) > self.BULK_DONE_MAX:
+            return Response({"detail": f"At most {self.BULK_DONE_MAX} tasks per request."}, status=400)
+
+        results = {}  # id -> result, in request order; the last entry for an id wins
+        values = {}
+        for entry in entries:
+            raw_id = entry.get("id") if isinstance(entry, dict) else None
+            try:
+                pk = int(raw_id)
+            except (TypeError, ValueError):
+                return Response({"detail": f"Invalid id: {raw_id!r}"}, status=400)
+            value = entry.get("value")
+            if value is not None:
+                try:
+                    value = float(value)
+                    if not math.isfinite(value):  # float() accepts "nan" and "inf"
+                        raise ValueError(value)
+                except (TypeError, ValueError, OverflowError):
+                    results[pk] = {"id": pk, "status": "invalid", "detail": "Invalid value"}
+                    values.pop(pk, None)
+                    continue
+                if value < 0:
+                    results[pk] = {"id": pk, "status": "invalid", "detail": "value must be >= 0"}
+                    values.pop(pk, None)
+                    continue
+            values[pk] = value
+            results[pk] = None
+
+        today = request.user.local_today()
+        to_mark = {}
+        with transaction.atomic():
+            # One query validates ownership, the past-date rule and status, and
+            # locks the rows so a concurrent request can't complete them twice.
+            rows = (
+                self.get_queryset()
+                .filter(pk__in=values)
+                .select_for_update(of=("self",))
+                .order_by()
+                .values_list("id", "date", "status", "value")
+            )
+            found = {pk: (day, task_status, old_value) for pk, day, task_status, old_value in rows}
+            for pk, value in values.items():
+                if pk not in found:
+                    results[pk] = {"id": pk, "status": "not_found"}
+                elif found[pk][0] < today:
+                    results[pk] = {"id": pk, "status": "invalid", "detail": "Past tasks are immutable."}
+                elif found[pk][1] == "done":
+                    results[pk] = {"id": pk, "status": "already_done"}
+                else:
+                    to_mark[pk] = value
+                    results[pk] = {"id": pk, "status": "done"}
+
+            if to_mark:
+                now = timezone.now()
+                changes = {"status": "done", "completed_at": now, "updated_at": now}
+                with_value = [When(pk=pk, then=Value(value)) for pk, value in to_mark.items() if value is not None]
+                if with_value:
+                    changes["value"] = Case(*with_value, default=F("value"), output_field=FloatField())
+                Task.objects.filter(pk__in=to_mark).update(**changes)
+                record_completions(request.user.id, [
+                    (found[pk][0], found[pk][2] if value is None else value) for pk, value in to_mark.items()
+                ])
+
+        if to_mark:
+            invalidate_task_lists({(request.user.id, found[pk][0]) for pk in to_mark})
+            update_streak_for_user(request.user)
+
+        return Response({"results": list(results.values())}, status=status.HTTP_200_OK)
+
 
 # -------------------
 # Streaks
@@ -163,5 +506,59 @@ class TaskViewSet(IsOwnerQuerysetMixin, viewsets.ModelViewSet):
 @permission_classes([IsAuthenticated])
 def streak_view(request):
     """Return current consecutive-day streak, computed from Streak record."""
+    etag = _etag_for(request, "streak")
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
     streak, _ = Streak.objects.get_or_create(owner=request.user)
-    return Response(StreakSerializer(streak).data)
+    return _with_etag(Response(StreakSerializer(streak).data), etag)
+
+
+# -------------------
+# Incremental sync
+# -------------------
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def sync_view(request):
+    """
+    GET /api/sync/?since=<cursor>: tasks, SWOT items and streak changed since
+    the cursor, plus ids to drop (deleted rows and deactivated SWOT items).
+    Omit ``since`` for a full snapshot; keep polling while ``has_more``.
+    """
+    try:
+        changes, cursor, has_more = changes_since(request.user, request.query_params.get("since"))
+    except InvalidCursor:
+        return Response({"detail": "Invalid cursor."}, status=400)
+
+    deleted = {"tasks": [], "swot": []}
+    for tombstone in changes["tombstones"]:
+        deleted["tasks" if tombstone.model == "task" else "swot"].append(tombstone.object_id)
+    deleted["swot"] += [item.pk for item in changes["swot"] if not item.active]
+
+    context = {"request": request}
+    streak = changes["streak"][0] if changes["streak"] else None
+    return Response({
+        "cursor": cursor,
+        "has_more": has_more,
+        "tasks": TaskSerializer(changes["tasks"], many=True, context=context).data,
+        "swot": SWOTItemSerializer([i for i in changes["swot"] if i.active], many=True, context=context).data,
+        "streak": StreakSerializer(streak).data if streak else None,
+        "deleted": deleted,
+    })
+
+
+# -------------------
+# Metrics (staff only)
+# -------------------
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """Process/cache counters for operators."""
+    return Response({
+        "task_list_cache": cache_stats(),
+        "auth_user_cache": user_cache.stats(),  # this process only
+        "auth_throttle": throttle_stats(),
+        "requests": request_metrics_snapshot(),  # empty unless API_METRICS=1
+        "db_connections": connection_snapshot(),  # this process only
+    })
@@ -20,26 +20,24 @@ const datesLast7 = () => {
 export default function ProgressPage() {
   const days = datesLast7();
 
-  // fetch tasks for each day (parallel)
-  const { data: all, isLoading } = useQuery({
-    queryKey: ["last7tasks"],
+  // per-day done/total, aggregated server-side in one request
+  const { data: summary, isLoading } = useQuery({
+    queryKey: ["last7summary", days[0], days[6]],
     queryFn: async () => {
-      const promises = days.map((d) =>
-        api.get(`/api/tasks/?date=${d}`).then((r) => r.data.results ?? r.data)
+      const r = await api.get(
+        `/api/tasks/summary/?start=${days[0]}&end=${days[6]}`
       );
-      return Promise.all(promises);
+      return r.data as { date: string; done: number; total: number }[];
     },
   });
 
   const stats = useMemo(() => {
-    if (!all) return [];
-    return all.map((tasks: any[], idx: number) => {
-      const done = tasks.filter((t) => t.status === "done").length;
-      const total = tasks.length || 0;
+    if (!summary) return [];
+    return summary.map(({ date, done, total }) => {
       const pct = total ? Math.round((done / total) * 100) : 0;
-      return { day: days[idx], done, total, pct };
+      return { day: date, done, total, pct };
     });
-  }, [all, days]);
+  }, [summary]);
 
   const barColor = (pct: number) =>
     pct >= 80